@@ -20,7 +20,7 @@ class Ui_MainWindow(object):
         """
         # 主窗口基本设置
         MainWindow.setObjectName("MainWindow")
-        MainWindow.resize(914, 600)  # 设置窗口初始大小
+        MainWindow.resize(914, 640)  # 设置窗口初始大小
 
         # 中央部件（所有UI元素的容器）
         self.centralwidget = QtWidgets.QWidget(parent=MainWindow)
@@ -61,8 +61,10 @@ class Ui_MainWindow(object):
 
         # -------------------------- 左侧文件处理队列 --------------------------
         # 待处理文件列表
-        self.processingFileList = QtWidgets.QListWidget(parent=self.centralwidget)
-        self.processingFileList.setGeometry(QtCore.QRect(10, 100, 271, 411))  # 位置和大小
+        self.processingFileList = QtWidgets.QListView(parent=self.centralwidget)
+        self.processingFileList.setGeometry(QtCore.QRect(10, 169, 271, 351))  # 位置和大小（位于标题标签下方）
+        self.processingFileList.setUniformItemSizes(True)  # 统一行高，支持大量文件时快速布局
+        self.processingFileList.setLayoutMode(QtWidgets.QListView.LayoutMode.Batched)  # 分批布局，避免界面卡顿
         self._set_dark_palette(self.processingFileList, bg_color=(33, 35, 39))  # 深灰色背景
         self.processingFileList.viewport().setProperty("cursor",
                                                        QtGui.QCursor(QtCore.Qt.CursorShape.WaitCursor))  # 等待光标
@@ -94,8 +96,10 @@ class Ui_MainWindow(object):
         self.logScrollContent.setObjectName("logScrollContent")
 
         # 处理日志列表（显示解析过程或结果）
-        self.processLogList = QtWidgets.QListWidget(parent=self.logScrollContent)
+        self.processLogList = QtWidgets.QListView(parent=self.logScrollContent)
         self.processLogList.setGeometry(QtCore.QRect(0, 0, 581, 341))  # 位置和大小
+        self.processLogList.setUniformItemSizes(True)  # 统一行高，支持大量文件时快速布局
+        self.processLogList.setLayoutMode(QtWidgets.QListView.LayoutMode.Batched)  # 分批布局，避免界面卡顿
         self._set_dark_palette(self.processLogList, bg_color=(33, 35, 39))  # 深灰色背景
         self.processLogList.viewport().setProperty("cursor", QtGui.QCursor(QtCore.Qt.CursorShape.WaitCursor))  # 等待光标
         self.processLogList.setObjectName("processLogList")
@@ -127,7 +131,7 @@ class Ui_MainWindow(object):
         # -------------------------- 进度条和按钮 --------------------------
         # 处理进度条（当前隐藏，高度为0）
         self.processProgressBar = QtWidgets.QProgressBar(parent=self.centralwidget)
-        self.processProgressBar.setGeometry(QtCore.QRect(10, 570, 891, 0))  # 位置和大小（高度0表示隐藏）
+        self.processProgressBar.setGeometry(QtCore.QRect(10, 610, 891, 0))  # 位置和大小（高度0表示隐藏）
         self._set_label_palette(self.processProgressBar, text_color=(255, 255, 255))  # 白色文本
         self.processProgressBar.setProperty("value", 0)  # 初始进度0%
         self.processProgressBar.setObjectName("processProgressBar")
@@ -145,6 +149,67 @@ class Ui_MainWindow(object):
         self.startProcessButton.setStyleSheet("background-color:#494949")
         self.startProcessButton.setObjectName("startProcessButton")
 
+        # 候选文件名数量标签
+        self.candidateCountLabel = QtWidgets.QLabel(parent=self.centralwidget)
+        self.candidateCountLabel.setGeometry(QtCore.QRect(299, 530, 121, 31))  # 位置和大小
+        self._set_label_palette(self.candidateCountLabel, text_color=(255, 255, 255))  # 白色文本
+        font = QtGui.QFont()
+        font.setFamily("思源宋体 Heavy")
+        font.setPointSize(12)
+        self.candidateCountLabel.setFont(font)
+        self.candidateCountLabel.setObjectName("candidateCountLabel")
+
+        # 候选文件名数量选择框（1表示只生成单一文件名）
+        self.candidateCountSpinBox = QtWidgets.QSpinBox(parent=self.centralwidget)
+        self.candidateCountSpinBox.setGeometry(QtCore.QRect(420, 530, 61, 31))  # 位置和大小
+        self.candidateCountSpinBox.setRange(1, 5)
+        self.candidateCountSpinBox.setValue(1)
+        self.candidateCountSpinBox.setStyleSheet("background-color:#494949; color:#ffffff")
+        self.candidateCountSpinBox.setObjectName("candidateCountSpinBox")
+
+        # 近似重复阈值标签
+        self.nearDuplicateLabel = QtWidgets.QLabel(parent=self.centralwidget)
+        self.nearDuplicateLabel.setGeometry(QtCore.QRect(299, 570, 121, 31))  # 位置和大小（位于候选数量下方）
+        self._set_label_palette(self.nearDuplicateLabel, text_color=(255, 255, 255))  # 白色文本
+        font = QtGui.QFont()
+        font.setFamily("思源宋体 Heavy")
+        font.setPointSize(12)
+        self.nearDuplicateLabel.setFont(font)
+        self.nearDuplicateLabel.setObjectName("nearDuplicateLabel")
+
+        # 近似重复相似度阈值选择框（最小值表示关闭近似重复检测）
+        self.nearDuplicateSpinBox = QtWidgets.QDoubleSpinBox(parent=self.centralwidget)
+        self.nearDuplicateSpinBox.setGeometry(QtCore.QRect(420, 570, 61, 31))  # 位置和大小
+        self.nearDuplicateSpinBox.setRange(0.0, 1.0)
+        self.nearDuplicateSpinBox.setDecimals(2)
+        self.nearDuplicateSpinBox.setSingleStep(0.05)
+        self.nearDuplicateSpinBox.setStyleSheet("background-color:#494949; color:#ffffff")
+        self.nearDuplicateSpinBox.setObjectName("nearDuplicateSpinBox")
+
+        # 复用近似重复文件名时追加区分后缀的复选框
+        self.nearDuplicateSuffixCheckBox = QtWidgets.QCheckBox(parent=self.centralwidget)
+        self.nearDuplicateSuffixCheckBox.setGeometry(QtCore.QRect(500, 570, 311, 31))  # 位置和大小
+        self._set_label_palette(self.nearDuplicateSuffixCheckBox, text_color=(255, 255, 255))  # 白色文本
+        self.nearDuplicateSuffixCheckBox.setFont(font)
+        self.nearDuplicateSuffixCheckBox.setObjectName("nearDuplicateSuffixCheckBox")
+
+        # 摘要索引检索输入框
+        self.searchLineEdit = QtWidgets.QLineEdit(parent=self.centralwidget)
+        self.searchLineEdit.setGeometry(QtCore.QRect(500, 530, 311, 31))  # 位置和大小
+        self.searchLineEdit.setStyleSheet("background-color:#494949; color:#ffffff")
+        self.searchLineEdit.setObjectName("searchLineEdit")
+
+        # 检索按钮
+        self.searchButton = QtWidgets.QToolButton(parent=self.centralwidget)
+        self.searchButton.setGeometry(QtCore.QRect(820, 530, 81, 31))  # 位置和大小
+        self._set_button_palette(self.searchButton, bg_color=(73, 73, 73), text_color=(255, 255, 255))
+        font = QtGui.QFont()
+        font.setFamily("思源宋体 Heavy")
+        font.setPointSize(12)
+        self.searchButton.setFont(font)
+        self.searchButton.setStyleSheet("background-color:#494949")
+        self.searchButton.setObjectName("searchButton")
+
         # 设置中央部件为主窗口的中心部件
         MainWindow.setCentralWidget(self.centralwidget)
 
@@ -161,6 +226,16 @@ class Ui_MainWindow(object):
         self.processingQueueLabel.setText(_translate("MainWindow", "文件处理队列"))  # 左侧列表标题
         self.processLogLabel.setText(_translate("MainWindow", "解析过程"))  # 右侧日志标题
         self.startProcessButton.setText(_translate("MainWindow", "开始！"))  # 按钮文本
+        self.candidateCountLabel.setText(_translate("MainWindow", "候选名称数"))  # 候选数量标签
+        self.candidateCountSpinBox.setToolTip(
+            _translate("MainWindow", "大于1时生成多个候选文件名，可在结果列表中右键选择"))  # 候选数量提示
+        self.nearDuplicateLabel.setText(_translate("MainWindow", "近似重复阈值"))  # 近似重复阈值标签
+        self.nearDuplicateSpinBox.setSpecialValueText(_translate("MainWindow", "关闭"))  # 最小值显示为关闭
+        self.nearDuplicateSpinBox.setToolTip(
+            _translate("MainWindow", "内容相似度达到该阈值的文件复用已有文件名，不再调用模型"))  # 阈值提示
+        self.nearDuplicateSuffixCheckBox.setText(_translate("MainWindow", "复用名称时追加区分后缀"))  # 后缀选项
+        self.searchLineEdit.setPlaceholderText(_translate("MainWindow", "检索已处理文件的摘要或文件名"))  # 检索提示
+        self.searchButton.setText(_translate("MainWindow", "检索"))  # 检索按钮文本
 
     # -------------------------- 工具方法（简化重复代码） --------------------------
     def _set_dark_palette(self, widget, bg_color):
@@ -0,0 +1,314 @@
+import copy
+import logging
+import threading
+import time
+from typing import Optional
+
+import torch
+from transformers.modeling_outputs import BaseModelOutput
+
+logger = logging.getLogger(__name__)
+
+
+class _EncoderWrapper(torch.nn.Module):
+    """将编码器包装为只接收张量、只返回隐藏状态的模块，便于编译和追踪"""
+
+    def __init__(self, encoder: torch.nn.Module):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.encoder(input_ids=input_ids, attention_mask=attention_mask, return_dict=True).last_hidden_state
+
+
+class _BucketStats:
+    """单个长度桶的命中与延迟统计"""
+
+    def __init__(self):
+        self.hits = 0  # 落入该桶的调用次数
+        self.compiled_calls = 0
+        self.compiled_seconds = 0.0
+        self.eager_calls = 0
+        self.eager_seconds = 0.0
+        self.warmup_eager_ms = 0.0  # 预热时测得的编码器即时执行延迟，作为对比基线
+        self.generate_eager_ms = 0.0  # 预热时测得的完整生成（编码器+束搜索解码）即时执行延迟
+        self.generate_compiled_ms = 0.0  # 同一输入在编译后的编码器和解码器上的完整生成延迟
+
+    def record(self, compiled: bool, seconds: float) -> None:
+        if compiled:
+            self.compiled_calls += 1
+            self.compiled_seconds += seconds
+        else:
+            self.eager_calls += 1
+            self.eager_seconds += seconds
+
+
+class AcceleratedInference:
+    """
+    按固定长度分桶的加速推理
+    将输入填充到少数几个固定长度，为每个长度编译（torch.compile）或追踪（TorchScript）编码器，
+    避免任意长度输入导致的反复编译；解码器单步前向通过 torch.compile 编译，
+    交叉注意力的长度同样只有几种取值。模型加载后在后台预热，未就绪的部分回退到即时执行
+    """
+    BUCKETS = (64, 128, 256, 512)
+    WARMUP_RUNS = 3  # 预热时每个桶的计时次数
+    GENERATE_RUNS = 2  # 预热时每个桶完整生成的计时次数
+    GENERATE_TOKENS = 30  # 完整生成计时的输出长度（与默认摘要最大长度一致，固定长度保证两种模式工作量相同）
+
+    BACKEND_AUTO = "auto"  # 优先 torch.compile，失败时回退到 TorchScript
+    BACKEND_COMPILE = "compile"
+    BACKEND_TRACE = "trace"
+
+    def __init__(self, model, device: str, pad_token_id: int, backend: str = BACKEND_AUTO,
+                 measure_generation: bool = False):
+        """
+        初始化加速推理
+
+        Args:
+            model: 已加载的 MT5ForConditionalGeneration 模型
+            device: 计算设备
+            pad_token_id: 填充token
+            backend: 编译后端（"auto"、"compile" 或 "trace"）
+            measure_generation: 预热后是否在各个桶上测量完整生成的端到端加速比
+                                （每个桶需额外完整生成数次，会与正式推理争抢计算资源，默认关闭）
+        """
+        if backend not in (self.BACKEND_AUTO, self.BACKEND_COMPILE, self.BACKEND_TRACE):
+            raise ValueError(f"不支持的编译后端: {backend}")
+
+        self.model = model
+        self.device = device
+        self.pad_token_id = pad_token_id
+        self.backend = backend
+        self.measure_generation = measure_generation
+
+        self._encoder = _EncoderWrapper(model.get_encoder()).eval()
+        self._eager_decoder = model.get_decoder()  # 编译前的解码器，用于测量即时执行的完整生成延迟
+        self._compiled: dict[int, torch.nn.Module] = {}  # 已就绪的桶 -> 编译后的编码器
+        self._stats = {bucket: _BucketStats() for bucket in self.BUCKETS}
+        self._lock = threading.Lock()
+        self._warmup_thread: Optional[threading.Thread] = None
+        self.decoder_compiled = False
+
+    # -------------------------- 分桶推理 --------------------------
+    def bucket_for(self, length: int) -> int:
+        """返回能容纳指定长度的最小桶"""
+        for bucket in self.BUCKETS:
+            if length <= bucket:
+                return bucket
+        return self.BUCKETS[-1]
+
+    def encode(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor]:
+        """
+        将输入填充到所属的桶并运行编码器
+
+        Args:
+            input_ids: 形状为 (1, 长度) 的输入token
+            attention_mask: 对应的注意力掩码
+
+        Returns:
+            (编码器隐藏状态, 填充后的注意力掩码)；填充位置被掩码屏蔽，不影响解码结果
+        """
+        bucket = self.bucket_for(input_ids.shape[1])
+        padding = bucket - input_ids.shape[1]
+        if padding > 0:
+            input_ids = torch.nn.functional.pad(input_ids, (0, padding), value=self.pad_token_id)
+            attention_mask = torch.nn.functional.pad(attention_mask, (0, padding), value=0)
+
+        compiled_encoder = self._compiled.get(bucket)
+        encoder = compiled_encoder if compiled_encoder is not None else self._encoder
+
+        start_time = time.perf_counter()
+        with torch.no_grad():
+            hidden_states = encoder(input_ids, attention_mask)
+        elapsed = time.perf_counter() - start_time
+
+        with self._lock:
+            stats = self._stats[bucket]
+            stats.hits += 1
+            stats.record(compiled_encoder is not None, elapsed)
+
+        return hidden_states, attention_mask
+
+    # -------------------------- 编译与预热 --------------------------
+    def _compile_bucket(self, bucket: int) -> torch.nn.Module:
+        """为指定长度的桶编译编码器"""
+        example_ids = torch.full((1, bucket), self.pad_token_id, dtype=torch.long, device=self.device)
+        example_mask = torch.ones_like(example_ids)
+
+        if self.backend in (self.BACKEND_AUTO, self.BACKEND_COMPILE):
+            try:
+                compiled = torch.compile(self._encoder, dynamic=False)
+                with torch.no_grad():
+                    compiled(example_ids, example_mask)  # 首次调用触发编译
+                logger.info(f"长度桶 {bucket} 使用 torch.compile 编译完成")
+                return compiled
+            except Exception as error:
+                if self.backend == self.BACKEND_COMPILE:
+                    raise
+                logger.warning(f"torch.compile 编译失败，回退到 TorchScript: {str(error)}")
+
+        with torch.no_grad():
+            traced = torch.jit.trace(self._encoder, (example_ids, example_mask), check_trace=False)
+        traced = torch.jit.freeze(traced.eval())
+        logger.info(f"长度桶 {bucket} 使用 TorchScript 追踪完成")
+        return traced
+
+    def _time_runs(self, encoder: torch.nn.Module, bucket: int) -> float:
+        """测量编码器在指定桶上的平均延迟（秒）"""
+        example_ids = torch.full((1, bucket), self.pad_token_id, dtype=torch.long, device=self.device)
+        example_mask = torch.ones_like(example_ids)
+        with torch.no_grad():
+            encoder(example_ids, example_mask)
+            start_time = time.perf_counter()
+            for _ in range(self.WARMUP_RUNS):
+                encoder(example_ids, example_mask)
+        return (time.perf_counter() - start_time) / self.WARMUP_RUNS
+
+    def _model_with_decoder(self, decoder: torch.nn.Module):
+        """返回共享参数、只替换解码器的模型浅拷贝（不影响前台推理使用的模型）"""
+        model_view = copy.copy(self.model)
+        model_view._modules = dict(self.model._modules)
+        model_view.decoder = decoder
+        return model_view
+
+    def _time_generation(self, model, encoder: torch.nn.Module, bucket: int) -> float:
+        """测量指定桶上完整生成（编码器+固定长度的束搜索解码）的平均延迟（秒）"""
+        example_ids = torch.full((1, bucket), self.pad_token_id, dtype=torch.long, device=self.device)
+        example_mask = torch.ones_like(example_ids)
+        with torch.no_grad():
+            start_time = time.perf_counter()
+            for _ in range(self.GENERATE_RUNS):
+                hidden_states = encoder(example_ids, example_mask)
+                model.generate(encoder_outputs=BaseModelOutput(last_hidden_state=hidden_states),
+                               attention_mask=example_mask, max_length=self.GENERATE_TOKENS,
+                               min_length=self.GENERATE_TOKENS, num_beams=4)
+        return (time.perf_counter() - start_time) / self.GENERATE_RUNS
+
+    def _warmup_decoder(self) -> None:
+        """
+        编译解码器并在各个桶上预热束搜索和贪心解码
+        预热在模型的浅拷贝上进行，完成后才替换原模型的解码器，避免前台推理等待编译
+        """
+        if self.backend == self.BACKEND_TRACE:
+            return  # 解码器依赖动态的KV缓存，TorchScript追踪无法覆盖
+
+        compiled_decoder = torch.compile(self._eager_decoder, dynamic=True)
+        warmup_model = self._model_with_decoder(compiled_decoder)
+
+        start_time = time.perf_counter()
+        for bucket in self.BUCKETS:
+            example_ids = torch.full((1, bucket), self.pad_token_id, dtype=torch.long, device=self.device)
+            example_mask = torch.ones_like(example_ids)
+            with torch.no_grad():
+                for num_beams in (4, 1):
+                    warmup_model.generate(input_ids=example_ids, attention_mask=example_mask,
+                                          max_length=8, min_length=8, num_beams=num_beams)
+
+        self.model.decoder = compiled_decoder
+        self.decoder_compiled = True
+        logger.info(f"解码器编译完成 (耗时 {time.perf_counter() - start_time:.1f} 秒)")
+
+    def warmup(self) -> None:
+        """依次编译并预热所有桶，同时测量即时执行与编译后的延迟"""
+        logger.info(f"开始预热加速推理 (后端: {self.backend}, 长度桶: {self.BUCKETS})")
+        for bucket in self.BUCKETS:
+            try:
+                eager_latency = self._time_runs(self._encoder, bucket)
+                compiled = self._compile_bucket(bucket)
+                compiled_latency = self._time_runs(compiled, bucket)
+            except Exception as error:
+                logger.error(f"长度桶 {bucket} 编译失败，保持即时执行: {str(error)}", exc_info=True)
+                continue
+
+            with self._lock:
+                self._compiled[bucket] = compiled
+                self._stats[bucket].warmup_eager_ms = eager_latency * 1000
+            logger.info(f"长度桶 {bucket} 就绪: 即时执行 {eager_latency * 1000:.1f} ms, "
+                        f"编译后 {compiled_latency * 1000:.1f} ms, "
+                        f"加速 {eager_latency / max(compiled_latency, 1e-9):.2f}x")
+
+        try:
+            self._warmup_decoder()
+        except Exception as error:
+            logger.error(f"解码器编译失败，保持即时执行: {str(error)}", exc_info=True)
+
+        if self.measure_generation:
+            self._measure_generation()
+        logger.info("加速推理预热完成")
+
+    def _measure_generation(self) -> None:
+        """
+        在各个桶上分别以即时执行和加速模式测量完整生成的延迟
+        编码器只占生成耗时的一小部分，端到端的加速比以此为准
+        """
+        eager_model = self._model_with_decoder(self._eager_decoder)
+        accelerated_model = self._model_with_decoder(self.model.get_decoder())
+        for bucket in self.BUCKETS:
+            try:
+                eager_latency = self._time_generation(eager_model, self._encoder, bucket)
+                compiled_latency = self._time_generation(
+                    accelerated_model, self._compiled.get(bucket, self._encoder), bucket)
+            except Exception as error:
+                logger.error(f"长度桶 {bucket} 完整生成计时失败: {str(error)}", exc_info=True)
+                continue
+
+            with self._lock:
+                self._stats[bucket].generate_eager_ms = eager_latency * 1000
+                self._stats[bucket].generate_compiled_ms = compiled_latency * 1000
+            logger.info(f"长度桶 {bucket} 完整生成: 即时执行 {eager_latency * 1000:.1f} ms, "
+                        f"加速后 {compiled_latency * 1000:.1f} ms, "
+                        f"加速 {eager_latency / max(compiled_latency, 1e-9):.2f}x")
+
+    def start_warmup(self) -> None:
+        """在后台线程中预热，不阻塞首批文件的处理"""
+        if self._warmup_thread is not None:
+            return
+        self._warmup_thread = threading.Thread(target=self.warmup, name="summly-warmup", daemon=True)
+        self._warmup_thread.start()
+
+    # -------------------------- 统计 --------------------------
+    def report(self) -> dict[int, dict[str, float]]:
+        """
+        汇总各长度桶的命中率与延迟
+
+        Returns:
+            桶长度 -> {"hits", "hit_rate", "compiled_calls", "eager_calls", "compiled_hit_rate",
+                       "encoder_compiled_ms", "encoder_eager_ms", "encoder_speedup",
+                       "generate_compiled_ms", "generate_eager_ms", "speedup"}
+            compiled_hit_rate 为该桶调用中使用编译后编码器的比例（其余调用发生在该桶就绪之前）；
+            编码器延迟为运行中的平均值（没有即时执行的调用时以预热基线作为即时执行延迟）；
+            完整生成延迟与加速比 speedup 为预热时对同一输入分别以两种模式测得的端到端结果
+            （仅在启用 measure_generation 时测量）；缺少数据时为0
+        """
+        with self._lock:
+            total_hits = sum(stats.hits for stats in self._stats.values())
+            report = {}
+            for bucket, stats in self._stats.items():
+                compiled_ms = stats.compiled_seconds / stats.compiled_calls * 1000 if stats.compiled_calls else 0.0
+                eager_ms = stats.eager_seconds / stats.eager_calls * 1000 if stats.eager_calls else stats.warmup_eager_ms
+                report[bucket] = {
+                    "hits": stats.hits,
+                    "hit_rate": stats.hits / total_hits if total_hits else 0.0,
+                    "compiled_calls": stats.compiled_calls,
+                    "eager_calls": stats.eager_calls,
+                    "compiled_hit_rate": stats.compiled_calls / stats.hits if stats.hits else 0.0,
+                    "encoder_compiled_ms": compiled_ms,
+                    "encoder_eager_ms": eager_ms,
+                    "encoder_speedup": eager_ms / compiled_ms if compiled_ms and eager_ms else 0.0,
+                    "generate_compiled_ms": stats.generate_compiled_ms,
+                    "generate_eager_ms": stats.generate_eager_ms,
+                    "speedup": (stats.generate_eager_ms / stats.generate_compiled_ms
+                                if stats.generate_compiled_ms and stats.generate_eager_ms else 0.0)
+                }
+        return report
+
+    def log_report(self) -> None:
+        """将各长度桶的统计写入日志"""
+        for bucket, bucket_report in self.report().items():
+            logger.info(f"长度桶 {bucket}: 命中 {bucket_report['hits']} 次 ({bucket_report['hit_rate']:.1%}), "
+                        f"编译后执行 {bucket_report['compiled_calls']} 次 / "
+                        f"即时执行 {bucket_report['eager_calls']} 次 (编译命中 {bucket_report['compiled_hit_rate']:.1%}), "
+                        f"完整生成 加速后 {bucket_report['generate_compiled_ms']:.1f} ms / "
+                        f"即时执行 {bucket_report['generate_eager_ms']:.1f} ms (加速 {bucket_report['speedup']:.2f}x), "
+                        f"其中编码器 编译后 {bucket_report['encoder_compiled_ms']:.1f} ms / "
+                        f"即时执行 {bucket_report['encoder_eager_ms']:.1f} ms (加速 {bucket_report['encoder_speedup']:.2f}x)")
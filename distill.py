@@ -0,0 +1,343 @@
+import argparse
+import copy
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
+from transformers import MT5ForConditionalGeneration
+
+from evaluation import list_corpus
+from processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class Distiller:
+    """
+    从mt5-small蒸馏小型学生模型
+    学生模型保留教师的部分编码器/解码器层，并把词表裁剪为语料中实际出现的token；
+    先用教师模型为本地语料生成摘要作为训练目标，再结合目标序列的交叉熵与教师输出分布的KL散度训练学生模型
+    """
+    DEFAULT_OUTPUT_PATH = "models/mt5-tiny"
+
+    # 教师生成训练目标时使用确定性的束搜索，保证目标稳定
+    TARGET_GENERATION_PARAMS = {
+        "max_length": 30,
+        "min_length": 10,
+        "num_beams": 4,
+        "early_stopping": True,
+        "no_repeat_ngram_size": 3
+    }
+
+    def __init__(self,
+                 teacher_path: str = TextProcessor.DEFAULT_MODEL_PATH,
+                 encoder_layers: int = 4,
+                 decoder_layers: int = 2,
+                 vocab_size: int = 32000,
+                 language: str = "en"):
+        """
+        初始化蒸馏器并加载教师模型
+
+        Args:
+            teacher_path: 教师模型目录
+            encoder_layers: 学生模型的编码器层数
+            decoder_layers: 学生模型的解码器层数
+            vocab_size: 学生模型的词表大小上限（含特殊token）
+            language: 语料的语言代码
+        """
+        self.teacher = TextProcessor(model_path=teacher_path)
+        self.teacher.load_model()
+        if self.teacher._vocab_map is not None:
+            raise ValueError(f"教师模型不能是裁剪词表的学生模型: {teacher_path}")
+
+        teacher_config = self.teacher.model.config
+        if not 1 <= encoder_layers <= teacher_config.num_layers:
+            raise ValueError(f"编码器层数必须在 1~{teacher_config.num_layers} 之间: {encoder_layers}")
+        if not 1 <= decoder_layers <= teacher_config.num_decoder_layers:
+            raise ValueError(f"解码器层数必须在 1~{teacher_config.num_decoder_layers} 之间: {decoder_layers}")
+
+        self.encoder_layers = encoder_layers
+        self.decoder_layers = decoder_layers
+        self.vocab_size = vocab_size
+        self.language = language
+        self.device = self.teacher.device
+
+    # -------------------------- 训练数据 --------------------------
+    def build_examples(self, file_paths: list[str]) -> list[tuple[list[int], list[int]]]:
+        """
+        用教师模型为语料生成训练目标
+
+        Args:
+            file_paths: 语料文件列表
+
+        Returns:
+            (输入token, 目标token) 列表，均为教师词表编号；目标不含解码起始token
+        """
+        examples = []
+        self.teacher.model.eval()
+        for file_index, file_path in enumerate(file_paths):
+            try:
+                file_content = self.teacher.read_content(file_path, self.language)
+            except Exception as error:
+                logger.warning(f"跳过无法读取的语料文件: {file_path}, 错误: {str(error)}")
+                continue
+            if not file_content.strip():
+                continue
+
+            # 与推理时相同的输入窗口和语言前缀
+            model_input = self.teacher._prepare_input(file_content, self.language)
+            with torch.no_grad():
+                output_ids = self.teacher.model.generate(**model_input, **self.TARGET_GENERATION_PARAMS)[0].tolist()
+
+            pad_token_id = self.teacher.tokenizer.pad_token_id
+            target_ids = [token_id for token_id in output_ids[1:] if token_id != pad_token_id]
+            examples.append((model_input["input_ids"][0].tolist(), target_ids))
+
+            if (file_index + 1) % 50 == 0:
+                logger.info(f"教师目标生成进度: {file_index + 1}/{len(file_paths)}")
+
+        logger.info(f"训练样本: {len(examples)} 个")
+        return examples
+
+    def build_vocab_map(self, examples: list[tuple[list[int], list[int]]]) -> list[int]:
+        """
+        按语料中的出现频率选择保留的token：特殊token编号保持不变，其后优先保留目标序列中的token
+
+        Args:
+            examples: build_examples 的返回值
+
+        Returns:
+            学生token -> 教师token 的映射列表
+        """
+        tokenizer = self.teacher.tokenizer
+        special_ids = sorted({tokenizer.pad_token_id, tokenizer.eos_token_id, tokenizer.unk_token_id})
+        if special_ids != list(range(len(special_ids))):
+            raise ValueError(f"特殊token编号必须从0开始连续: {special_ids}")
+
+        target_counts = Counter(token_id for _, target_ids in examples for token_id in target_ids)
+        input_counts = Counter(token_id for input_ids, _ in examples for token_id in input_ids)
+        prefix_ids = {
+            token_id
+            for prefix in TextProcessor.LANGUAGE_PREFIXES.values()
+            for token_id in tokenizer(prefix, add_special_tokens=False)["input_ids"]
+        }
+
+        vocab_map = list(special_ids)
+        selected = set(vocab_map)
+        ordered_ids = (sorted(prefix_ids)
+                       + [token_id for token_id, _ in target_counts.most_common()]
+                       + [token_id for token_id, _ in input_counts.most_common()])
+        for token_id in ordered_ids:
+            if len(vocab_map) >= self.vocab_size:
+                break
+            if token_id not in selected:
+                selected.add(token_id)
+                vocab_map.append(token_id)
+
+        covered = sum(count for token_id, count in input_counts.items() if token_id in selected)
+        logger.info(f"裁剪词表: {len(vocab_map)} 个token, 语料输入覆盖率 "
+                    f"{covered / max(1, sum(input_counts.values())):.2%}")
+        return vocab_map
+
+    # -------------------------- 学生模型 --------------------------
+    @staticmethod
+    def _select_layers(total: int, count: int) -> list[int]:
+        """在教师的各层中均匀选择，总是包含第0层（其中含相对位置偏置）和最后一层"""
+        if count == 1:
+            return [0]
+        return [round(i * (total - 1) / (count - 1)) for i in range(count)]
+
+    def build_student(self, vocab_map: list[int]) -> MT5ForConditionalGeneration:
+        """
+        构建学生模型，并用教师模型对应层和裁剪后的词向量初始化
+
+        Args:
+            vocab_map: 学生token -> 教师token 的映射列表
+
+        Returns:
+            学生模型
+        """
+        teacher_model = self.teacher.model
+        config = copy.deepcopy(teacher_model.config)
+        config.num_layers = self.encoder_layers
+        config.num_decoder_layers = self.decoder_layers
+        config.vocab_size = len(vocab_map)
+
+        student = MT5ForConditionalGeneration(config).to(self.device)
+        token_ids = torch.tensor(vocab_map, dtype=torch.long, device=self.device)
+        with torch.no_grad():
+            student.shared.weight.copy_(teacher_model.shared.weight[token_ids])
+            student.lm_head.weight.copy_(teacher_model.lm_head.weight[token_ids])
+
+        for student_stack, teacher_stack in ((student.encoder, teacher_model.encoder),
+                                             (student.decoder, teacher_model.decoder)):
+            layers = self._select_layers(len(teacher_stack.block), len(student_stack.block))
+            for student_block, teacher_index in zip(student_stack.block, layers):
+                student_block.load_state_dict(teacher_stack.block[teacher_index].state_dict())
+            student_stack.final_layer_norm.load_state_dict(teacher_stack.final_layer_norm.state_dict())
+            logger.info(f"学生模型沿用教师层: {layers}")
+
+        parameter_count = sum(parameter.numel() for parameter in student.parameters())
+        logger.info(f"学生模型参数量: {parameter_count / 1e6:.1f}M "
+                    f"(教师 {sum(parameter.numel() for parameter in teacher_model.parameters()) / 1e6:.1f}M)")
+        return student
+
+    # -------------------------- 训练 --------------------------
+    def _pad_batch(self, sequences: list[list[int]], pad_value: int) -> torch.Tensor:
+        length = max(len(sequence) for sequence in sequences)
+        return torch.tensor([sequence + [pad_value] * (length - len(sequence)) for sequence in sequences],
+                            dtype=torch.long, device=self.device)
+
+    def train(self,
+              student: MT5ForConditionalGeneration,
+              vocab_map: list[int],
+              examples: list[tuple[list[int], list[int]]],
+              epochs: int = 3,
+              batch_size: int = 8,
+              learning_rate: float = 5e-4,
+              temperature: float = 2.0,
+              alpha: float = 0.5) -> None:
+        """
+        训练学生模型：loss = alpha * 目标序列交叉熵 + (1 - alpha) * T² * KL(教师分布 || 学生分布)
+
+        Args:
+            student: build_student 构建的学生模型
+            vocab_map: 学生token -> 教师token 的映射列表
+            examples: build_examples 的返回值
+            epochs: 训练轮数
+            batch_size: 批大小
+            learning_rate: 学习率
+            temperature: 蒸馏温度
+            alpha: 交叉熵损失的权重
+        """
+        pad_token_id = self.teacher.tokenizer.pad_token_id
+        unk_token_id = self.teacher.tokenizer.unk_token_id
+        token_ids = torch.tensor(vocab_map, dtype=torch.long, device=self.device)
+        teacher_to_student = {teacher_id: student_id for student_id, teacher_id in enumerate(vocab_map)}
+
+        optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate)
+        self.teacher.model.eval()
+        student.train()
+
+        for epoch in range(epochs):
+            random.shuffle(examples)
+            epoch_loss = 0.0
+            start_time = time.perf_counter()
+            for start in range(0, len(examples), batch_size):
+                batch = examples[start:start + batch_size]
+                teacher_inputs = self._pad_batch([input_ids for input_ids, _ in batch], pad_token_id)
+                attention_mask = (teacher_inputs != pad_token_id).long()
+                teacher_labels = self._pad_batch([target_ids for _, target_ids in batch], -100)
+                student_inputs = self._pad_batch([
+                    [teacher_to_student.get(token_id, unk_token_id) for token_id in input_ids] for input_ids, _ in batch
+                ], pad_token_id)
+                student_labels = self._pad_batch([
+                    [teacher_to_student.get(token_id, unk_token_id) for token_id in target_ids] for _, target_ids in batch
+                ], -100)
+
+                with torch.no_grad():
+                    teacher_logits = self.teacher.model(input_ids=teacher_inputs, attention_mask=attention_mask,
+                                                        labels=teacher_labels).logits[..., token_ids]
+                outputs = student(input_ids=student_inputs, attention_mask=attention_mask, labels=student_labels)
+
+                # 只在目标序列的有效位置上计算KL散度
+                label_mask = student_labels != -100
+                kl_loss = F.kl_div(
+                    F.log_softmax(outputs.logits[label_mask] / temperature, dim=-1),
+                    F.log_softmax(teacher_logits[label_mask] / temperature, dim=-1),
+                    log_target=True,
+                    reduction="batchmean"
+                ) * temperature ** 2
+                loss = alpha * outputs.loss + (1 - alpha) * kl_loss
+
+                optimizer.zero_grad()
+                loss.backward()
+                torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+                optimizer.step()
+                epoch_loss += loss.item() * len(batch)
+
+            logger.info(f"第 {epoch + 1}/{epochs} 轮: 平均损失 {epoch_loss / max(1, len(examples)):.4f} "
+                        f"(耗时 {time.perf_counter() - start_time:.1f} 秒)")
+
+        student.eval()
+
+    def save(self, student: MT5ForConditionalGeneration, vocab_map: list[int], output_path: str) -> None:
+        """
+        保存学生模型、分词器和词表映射，输出目录可直接作为 TextProcessor 的 model_path
+
+        Args:
+            student: 训练后的学生模型
+            vocab_map: 学生token -> 教师token 的映射列表
+            output_path: 输出目录
+        """
+        os.makedirs(output_path, exist_ok=True)
+        student.save_pretrained(output_path)
+        self.teacher.tokenizer.save_pretrained(output_path)
+        with open(os.path.join(output_path, TextProcessor.VOCAB_MAP_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(vocab_map, f)
+        logger.info(f"学生模型已保存: {output_path}")
+
+    def distill(self,
+                corpus_dir: str,
+                output_path: str = DEFAULT_OUTPUT_PATH,
+                limit: Optional[int] = None,
+                **train_kwargs) -> None:
+        """
+        完整的蒸馏流程：生成训练目标、裁剪词表、构建并训练学生模型、保存
+
+        Args:
+            corpus_dir: 本地语料目录
+            output_path: 学生模型输出目录
+            limit: 最多使用的语料文件数
+            train_kwargs: 传递给 train 的训练参数
+        """
+        file_paths = list_corpus(corpus_dir, limit)
+        if not file_paths:
+            raise ValueError(f"语料目录中没有支持的文件: {corpus_dir}")
+
+        logger.info(f"开始蒸馏: {len(file_paths)} 个语料文件, 编码器 {self.encoder_layers} 层, "
+                    f"解码器 {self.decoder_layers} 层, 词表上限 {self.vocab_size}")
+        examples = self.build_examples(file_paths)
+        if not examples:
+            raise ValueError("语料中没有可用的文本")
+
+        vocab_map = self.build_vocab_map(examples)
+        student = self.build_student(vocab_map)
+        self.train(student, vocab_map, examples, **train_kwargs)
+        self.save(student, vocab_map, output_path)
+
+
+if __name__ == "__main__":
+    """命令行入口：在本地语料上蒸馏学生模型"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    parser = argparse.ArgumentParser(description="Summly 学生模型蒸馏")
+    parser.add_argument("corpus_dir", help="本地语料目录")
+    parser.add_argument("--teacher", default=TextProcessor.DEFAULT_MODEL_PATH, help="教师模型目录")
+    parser.add_argument("--output", default=Distiller.DEFAULT_OUTPUT_PATH, help="学生模型输出目录")
+    parser.add_argument("--encoder-layers", type=int, default=4, help="学生模型的编码器层数")
+    parser.add_argument("--decoder-layers", type=int, default=2, help="学生模型的解码器层数")
+    parser.add_argument("--vocab-size", type=int, default=32000, help="裁剪后的词表大小上限")
+    parser.add_argument("--language", default="en", help="语料的语言代码")
+    parser.add_argument("--limit", type=int, help="最多使用的语料文件数")
+    parser.add_argument("--epochs", type=int, default=3, help="训练轮数")
+    parser.add_argument("--batch-size", type=int, default=8, help="批大小")
+    parser.add_argument("--learning-rate", type=float, default=5e-4, help="学习率")
+    parser.add_argument("--temperature", type=float, default=2.0, help="蒸馏温度")
+    parser.add_argument("--alpha", type=float, default=0.5, help="目标序列交叉熵损失的权重")
+    args = parser.parse_args()
+
+    distiller = Distiller(args.teacher, args.encoder_layers, args.decoder_layers, args.vocab_size, args.language)
+    distiller.distill(args.corpus_dir, args.output, args.limit,
+                      epochs=args.epochs, batch_size=args.batch_size, learning_rate=args.learning_rate,
+                      temperature=args.temperature, alpha=args.alpha)
@@ -0,0 +1,456 @@
+import argparse
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from typing import Optional
+
+from filelock import FileLock
+
+from file_reader import FileReader
+from near_duplicate import NearDuplicateIndex
+from processor import TextProcessor
+from rename_engine import RenameEngine
+from resource_governor import ResourceGovernor
+
+logger = logging.getLogger(__name__)
+
+
+class LeaseLostError(RuntimeError):
+    """租约已过期或被其他节点回收"""
+
+
+class WorkCoordinator:
+    """
+    基于共享文件系统的分布式任务协调器
+    目录清单被切分为若干块，各节点通过租约文件认领任务块并定期心跳续约；
+    节点崩溃后租约过期，其他节点可回收该任务块继续处理。无需额外的消息中间件
+    """
+    STATE_DIR_NAME = ".summly"
+    DEFAULT_CHUNK_SIZE = 64  # 每个任务块包含的文件数
+    DEFAULT_LEASE_TTL = 120.0  # 租约有效期（秒），超过该时间未心跳即视为过期
+
+    def __init__(self,
+                 root_dir: str,
+                 worker_id: Optional[str] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 lease_ttl: float = DEFAULT_LEASE_TTL):
+        """
+        初始化任务协调器
+
+        Args:
+            root_dir: 待处理的共享目录
+            worker_id: 节点标识，默认由主机名和进程号生成
+            chunk_size: 每个任务块包含的文件数
+            lease_ttl: 租约有效期（秒）
+        """
+        self.root_dir = os.path.abspath(root_dir)
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.chunk_size = chunk_size
+        self.lease_ttl = lease_ttl
+
+        # 共享状态目录布局
+        self.state_dir = os.path.join(self.root_dir, self.STATE_DIR_NAME)
+        self.lease_dir = os.path.join(self.state_dir, "leases")  # 加载清单后切换到所属轮次的目录
+        self.done_dir = os.path.join(self.state_dir, "done")
+        self.manifest_path = os.path.join(self.state_dir, "manifest.json")
+        self.journal_path = os.path.join(self.state_dir, "rename_journal.jsonl")
+        self.journal_lock_path = os.path.join(self.state_dir, "rename_journal.lock")
+        self.directory_lock_dir = os.path.join(self.state_dir, "directory_locks")
+        self._clock_path = os.path.join(self.state_dir, "clock")
+
+        os.makedirs(self.state_dir, exist_ok=True)
+
+        self.run_id = 0
+        self._chunks: list[list[str]] = []
+        self._claim_cursor = 0
+        self._done_chunks: set[int] = set()
+        logger.info(f"分布式协调器初始化: 节点 {self.worker_id}, 目录 {self.root_dir}")
+
+    # -------------------------- 任务清单 --------------------------
+    def prepare_manifest(self) -> int:
+        """
+        加载任务清单；清单不存在，或已有清单的任务块全部完成时，由首个节点重新列出目录，
+        为新增的文件生成新一轮清单（已处理过的文件不会再次进入清单）
+
+        Returns:
+            任务块数量
+        """
+        with FileLock(self.manifest_path + ".lock"):
+            manifest = None
+            if os.path.exists(self.manifest_path):
+                with open(self.manifest_path, "r", encoding="utf-8") as f:
+                    manifest = json.load(f)
+                self._use_run(manifest.get("run", 0), manifest["chunks"])
+                if self.progress()[0] < len(self._chunks):
+                    logger.info(f"加载已有任务清单: 第 {self.run_id} 轮, {len(self._chunks)} 个任务块")
+                    return len(self._chunks)
+
+            # 此前各轮中处理成功的文件及其重命名结果视为已处理；处理或重命名失败的文件会进入下一轮清单重试
+            seen_paths = set(manifest.get("seen", [])) if manifest else set()
+            if manifest:
+                seen_paths.update(self._processed_paths())
+                renamed = RenameEngine(journal_path=self.journal_path, root_dir=self.root_dir).renamed_sources()
+                seen_paths.update(os.path.relpath(path, self.root_dir) for item in renamed.items() for path in item)
+
+            supported_suffixes = set(FileReader.supported_suffixes())
+            file_paths = []
+            for directory, sub_directories, file_names in os.walk(self.root_dir):
+                sub_directories[:] = [name for name in sub_directories if name != self.STATE_DIR_NAME]
+                for file_name in file_names:
+                    if os.path.splitext(file_name)[1].lower() in supported_suffixes:
+                        relative_path = os.path.relpath(os.path.join(directory, file_name), self.root_dir)
+                        if relative_path not in seen_paths:
+                            file_paths.append(relative_path)
+            file_paths.sort()
+            if manifest and not file_paths:
+                logger.info(f"第 {self.run_id} 轮任务已全部完成，没有新增文件")
+                return len(self._chunks)
+
+            chunks = [
+                file_paths[start:start + self.chunk_size]
+                for start in range(0, len(file_paths), self.chunk_size)
+            ]
+            run_id = manifest.get("run", 0) + 1 if manifest else 1
+            temp_path = f"{self.manifest_path}.{self.worker_id}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"run": run_id, "created": time.time(), "chunks": chunks, "seen": sorted(seen_paths)},
+                          f, ensure_ascii=False)
+            os.replace(temp_path, self.manifest_path)
+            self._use_run(run_id, chunks)
+
+            logger.info(f"生成任务清单: 第 {run_id} 轮, {len(file_paths)} 个文件, {len(chunks)} 个任务块")
+            return len(chunks)
+
+    def _processed_paths(self) -> set[str]:
+        """汇总当前轮次各完成标记中记录的处理成功的文件（相对路径）"""
+        processed = set()
+        for chunk_id in range(len(self._chunks)):
+            try:
+                with open(self._done_path(chunk_id), "r", encoding="utf-8") as f:
+                    content = f.read()
+            except FileNotFoundError:
+                continue
+            try:
+                processed.update(json.loads(content)["processed"])
+            except (ValueError, KeyError, TypeError):
+                # 旧版完成标记只记录节点标识，整个任务块视为已处理
+                processed.update(self._chunks[chunk_id])
+        return processed
+
+    def _use_run(self, run_id: int, chunks: list[list[str]]) -> None:
+        """切换到指定轮次的清单及其租约、完成标记目录（第0轮为旧版清单，沿用状态目录下的布局）"""
+        self.run_id = run_id
+        self._chunks = chunks
+        # 认领游标：从上次认领的位置继续扫描，已确认完成的任务块不再重复检查
+        self._claim_cursor = hash(self.worker_id) % len(chunks) if chunks else 0
+        self._done_chunks = set()
+        run_dir = self.state_dir if run_id == 0 else os.path.join(self.state_dir, "runs", str(run_id))
+        self.lease_dir = os.path.join(run_dir, "leases")
+        self.done_dir = os.path.join(run_dir, "done")
+        for directory in (self.lease_dir, self.done_dir):
+            os.makedirs(directory, exist_ok=True)
+
+    def chunk_files(self, chunk_id: int) -> list[str]:
+        """返回任务块中文件的绝对路径"""
+        return [os.path.join(self.root_dir, path) for path in self._chunks[chunk_id]]
+
+    # -------------------------- 租约 --------------------------
+    def _lease_path(self, chunk_id: int) -> str:
+        return os.path.join(self.lease_dir, f"{chunk_id:08d}.lease")
+
+    def _done_path(self, chunk_id: int) -> str:
+        return os.path.join(self.done_dir, f"{chunk_id:08d}.done")
+
+    def _filesystem_now(self) -> float:
+        """以共享文件系统的时钟为准获取当前时间，避免各节点本地时钟偏差影响租约判断"""
+        with open(self._clock_path, "a"):
+            pass
+        os.utime(self._clock_path)
+        return os.stat(self._clock_path).st_mtime
+
+    def _write_lease(self, lease_path: str) -> None:
+        """原子地写入（或覆盖）租约文件"""
+        temp_path = f"{lease_path}.{self.worker_id}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.worker_id)
+        os.replace(temp_path, lease_path)
+
+    def _lease_owner(self, lease_path: str) -> Optional[str]:
+        """读取租约持有者，租约不存在时返回None"""
+        try:
+            with open(lease_path, "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def claim_chunk(self) -> Optional[tuple[int, bool]]:
+        """
+        认领一个未完成的任务块
+
+        Returns:
+            (任务块编号, 是否为回收的过期租约)，没有可认领的任务块时返回None
+        """
+        chunk_count = len(self._chunks)
+        if chunk_count == 0:
+            return None
+
+        # 各节点从不同位置开始扫描以减少争抢，之后从上次认领的位置继续
+        for offset in range(chunk_count):
+            chunk_id = (self._claim_cursor + offset) % chunk_count
+            if chunk_id in self._done_chunks:
+                continue
+            if os.path.exists(self._done_path(chunk_id)):
+                self._done_chunks.add(chunk_id)
+                continue
+
+            lease_path = self._lease_path(chunk_id)
+            try:
+                # O_EXCL 保证只有一个节点能创建租约文件
+                descriptor = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                    f.write(self.worker_id)
+                logger.info(f"认领任务块 #{chunk_id}")
+                self._claim_cursor = (chunk_id + 1) % chunk_count
+                return chunk_id, False
+            except FileExistsError:
+                pass
+
+            if self._try_reclaim(chunk_id):
+                self._claim_cursor = (chunk_id + 1) % chunk_count
+                return chunk_id, True
+
+        return None
+
+    def _try_reclaim(self, chunk_id: int) -> bool:
+        """回收已过期的租约（在锁内复核，防止多个节点同时回收）"""
+        lease_path = self._lease_path(chunk_id)
+        try:
+            if self._filesystem_now() - os.stat(lease_path).st_mtime < self.lease_ttl:
+                return False
+        except FileNotFoundError:
+            return False
+
+        with FileLock(lease_path + ".lock"):
+            try:
+                lease_age = self._filesystem_now() - os.stat(lease_path).st_mtime
+            except FileNotFoundError:
+                return False
+            if lease_age < self.lease_ttl or os.path.exists(self._done_path(chunk_id)):
+                return False
+
+            previous_owner = self._lease_owner(lease_path)
+            self._write_lease(lease_path)
+
+        logger.warning(f"回收过期租约: 任务块 #{chunk_id} (原持有者: {previous_owner}, 已过期 {lease_age:.0f} 秒)")
+        return True
+
+    def heartbeat(self, chunk_id: int) -> None:
+        """
+        续约任务块租约
+
+        Raises:
+            LeaseLostError: 租约已被其他节点回收
+        """
+        lease_path = self._lease_path(chunk_id)
+        if self._lease_owner(lease_path) != self.worker_id:
+            raise LeaseLostError(f"任务块 #{chunk_id} 的租约已丢失")
+        os.utime(lease_path)
+
+    def complete_chunk(self, chunk_id: int, processed_files: Optional[list[str]] = None) -> None:
+        """
+        标记任务块完成并释放租约
+
+        Args:
+            chunk_id: 任务块编号
+            processed_files: 处理成功的文件绝对路径，默认为整个任务块；未列出的文件会在下一轮重试
+        """
+        if processed_files is None:
+            processed_files = self.chunk_files(chunk_id)
+        processed = [os.path.relpath(path, self.root_dir) for path in processed_files]
+        with open(self._done_path(chunk_id), "w", encoding="utf-8") as f:
+            json.dump({"worker": self.worker_id, "processed": processed}, f, ensure_ascii=False)
+        self._done_chunks.add(chunk_id)
+        try:
+            os.remove(self._lease_path(chunk_id))
+        except FileNotFoundError:
+            pass
+        logger.info(f"任务块 #{chunk_id} 处理完成")
+
+    def progress(self) -> tuple[int, int]:
+        """返回 (已完成任务块数, 任务块总数)"""
+        return len(os.listdir(self.done_dir)), len(self._chunks)
+
+
+class _HeartbeatThread(threading.Thread):
+    """后台心跳线程，在处理任务块期间定期续约"""
+
+    def __init__(self, coordinator: WorkCoordinator, chunk_id: int):
+        super().__init__(daemon=True)
+        self.coordinator = coordinator
+        self.chunk_id = chunk_id
+        self.lease_lost = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        interval = self.coordinator.lease_ttl / 4
+        while not self._stopped.wait(interval):
+            try:
+                self.coordinator.heartbeat(self.chunk_id)
+            except LeaseLostError as error:
+                logger.error(str(error))
+                self.lease_lost.set()
+                return
+            except OSError as error:
+                logger.warning(f"心跳失败，稍后重试: {str(error)}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+class DistributedWorker:
+    """
+    分布式批处理节点
+    循环认领任务块，生成摘要并通过共享日志执行重命名，直到所有任务块完成
+    """
+
+    def __init__(self, coordinator: WorkCoordinator, processor: Optional[TextProcessor] = None):
+        """
+        初始化处理节点
+
+        Args:
+            coordinator: 任务协调器
+            processor: 文本处理器，默认新建
+        """
+        self.coordinator = coordinator
+        self.processor = processor or TextProcessor()
+        self.rename_engine = RenameEngine(
+            journal_path=coordinator.journal_path,
+            journal_lock_path=coordinator.journal_lock_path,
+            directory_lock_dir=coordinator.directory_lock_dir,
+            root_dir=coordinator.root_dir  # 日志中保存相对路径，各节点可将共享目录挂载在不同位置
+        )
+
+    def run(self) -> tuple[int, int]:
+        """
+        处理任务直到没有可认领的任务块
+
+        Returns:
+            (成功数, 失败数)
+        """
+        self.coordinator.prepare_manifest()
+        batch_id = self.rename_engine.begin_batch()
+        success_count = 0
+        failed_count = 0
+
+        while (claim := self.coordinator.claim_chunk()) is not None:
+            chunk_id, reclaimed = claim
+            heartbeat = _HeartbeatThread(self.coordinator, chunk_id)
+            heartbeat.start()
+            try:
+                processed_files, chunk_failed = self._process_chunk(chunk_id, reclaimed, heartbeat)
+                success_count += len(processed_files)
+                failed_count += chunk_failed
+                self.coordinator.complete_chunk(chunk_id, processed_files)
+            except LeaseLostError as error:
+                logger.warning(f"放弃任务块 #{chunk_id}: {str(error)}")
+            finally:
+                heartbeat.stop()
+
+            done_count, chunk_count = self.coordinator.progress()
+            logger.info(f"整体进度: {done_count}/{chunk_count} 个任务块")
+
+        logger.info(f"节点处理结束: 成功 {success_count} 个, 失败 {failed_count} 个 (重命名批次: {batch_id})")
+        return success_count, failed_count
+
+    def _process_chunk(self, chunk_id: int, reclaimed: bool, heartbeat: _HeartbeatThread) -> tuple[list[str], int]:
+        """
+        处理单个任务块
+
+        Args:
+            chunk_id: 任务块编号
+            reclaimed: 是否为回收的过期租约（此时部分文件可能已被原节点重命名）
+            heartbeat: 任务块的心跳线程
+
+        Returns:
+            (处理成功的文件路径列表, 失败数)
+        """
+        file_paths = self.coordinator.chunk_files(chunk_id)
+
+        # 回收的任务块需对照共享日志，跳过原节点已完成的重命名，保证每个文件只重命名一次
+        # （日志中的相对路径已按本节点的根目录解析）
+        already_renamed = self.rename_engine.renamed_sources() if reclaimed else {}
+
+        summaries = []
+        failed_count = 0
+        for file_path in file_paths:
+            if heartbeat.lease_lost.is_set():
+                raise LeaseLostError(f"任务块 #{chunk_id} 的租约已丢失")
+
+            if file_path in already_renamed or not os.path.exists(file_path):
+                logger.info(f"文件已被处理或不存在，跳过: {file_path}")
+                continue
+
+            try:
+                filename_summary, _ = self.processor.process_file(file_path)
+                summaries.append((file_path, filename_summary))
+            except Exception as e:
+                failed_count += 1
+                logger.error(f"处理文件 {file_path} 失败: {str(e)}")
+                logger.debug(f"错误详情:\n{traceback.format_exc()}")
+
+        # 执行重命名前确认租约仍然有效，避免与回收该任务块的节点重复重命名
+        self.coordinator.heartbeat(chunk_id)
+        # 同一目录的文件可能分布在多个节点的任务块中，按目录加锁后重新规划，避免选出相同的目标名称
+        operations, errors = self.rename_engine.plan_and_apply(summaries)
+        rename_failed = {operation.source for operation, error in zip(operations, errors) if error is not None}
+        failed_count += len(rename_failed)
+
+        processed_files = [file_path for file_path, _ in summaries if file_path not in rename_failed]
+        return processed_files, failed_count
+
+
+if __name__ == "__main__":
+    """命令行入口：在当前节点上启动分布式处理"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    parser = argparse.ArgumentParser(description="Summly 分布式批处理节点")
+    parser.add_argument("root_dir", help="多个节点共享的待处理目录")
+    parser.add_argument("--worker-id", help="节点标识（默认由主机名和进程号生成）")
+    parser.add_argument("--chunk-size", type=int, default=WorkCoordinator.DEFAULT_CHUNK_SIZE, help="每个任务块的文件数")
+    parser.add_argument("--lease-ttl", type=float, default=WorkCoordinator.DEFAULT_LEASE_TTL, help="租约有效期（秒）")
+    parser.add_argument("--accelerated", action="store_true", help="启用分桶编译的加速推理")
+    parser.add_argument("--measure-speedup", action="store_true",
+                        help="加速推理预热后测量各长度桶完整生成的端到端加速比（会占用额外的计算资源）")
+    parser.add_argument("--model-path", default=TextProcessor.DEFAULT_MODEL_PATH,
+                        help="模型目录（可使用 distill.py 生成的学生模型）")
+    parser.add_argument("--near-duplicate-threshold", type=float,
+                        help="近似重复判定的相似度阈值，命中时复用已有文件名（默认不检测近似重复）")
+    parser.add_argument("--near-duplicate-suffix", action="store_true",
+                        help="复用近似重复文件名时追加基于内容哈希的区分后缀")
+    args = parser.parse_args()
+
+    ResourceGovernor().configure_torch()
+    work_coordinator = WorkCoordinator(args.root_dir, args.worker_id, args.chunk_size, args.lease_ttl)
+    # 索引仅保存在本节点内存中，避免多个节点同时写入同一个索引文件
+    near_duplicate_index = (
+        NearDuplicateIndex(threshold=args.near_duplicate_threshold)
+        if args.near_duplicate_threshold is not None else None
+    )
+    text_processor = TextProcessor(near_duplicate_index=near_duplicate_index,
+                                   near_duplicate_suffix=args.near_duplicate_suffix,
+                                   accelerated=args.accelerated, model_path=args.model_path,
+                                   measure_speedup=args.measure_speedup)
+    worker = DistributedWorker(work_coordinator, text_processor)
+    succeeded, failed = worker.run()
+    if worker.processor.accelerator is not None:
+        worker.processor.accelerator.log_report()
+    print(f"处理完成: 成功 {succeeded} 个, 失败 {failed} 个")
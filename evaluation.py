@@ -0,0 +1,266 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from typing import Optional
+
+import torch
+
+from file_reader import FileReader
+from processor import TextProcessor
+from resource_governor import process_rss
+
+logger = logging.getLogger(__name__)
+
+# ROUGE分词：拉丁等语言按词切分，中日韩文字按单字切分
+_CJK_RANGES = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af'
+_ROUGE_TOKEN_PATTERN = re.compile(rf'[{_CJK_RANGES}]|[^\W{_CJK_RANGES}]+')
+
+
+def list_corpus(corpus_dir: str, limit: Optional[int] = None) -> list[str]:
+    """
+    列出语料目录中所有支持格式的文件
+
+    Args:
+        corpus_dir: 语料目录
+        limit: 最多返回的文件数
+
+    Returns:
+        排序后的文件路径列表
+    """
+    supported_suffixes = set(FileReader.supported_suffixes())
+    file_paths = []
+    for directory, _, file_names in os.walk(corpus_dir):
+        for file_name in file_names:
+            if os.path.splitext(file_name)[1].lower() in supported_suffixes:
+                file_paths.append(os.path.join(directory, file_name))
+    file_paths.sort()
+    return file_paths[:limit] if limit else file_paths
+
+
+def _rouge_tokens(text: str) -> list[str]:
+    return _ROUGE_TOKEN_PATTERN.findall(text.lower())
+
+
+def _f1(overlap: int, candidate_count: int, reference_count: int) -> float:
+    if overlap == 0:
+        return 0.0
+    precision = overlap / candidate_count
+    recall = overlap / reference_count
+    return 2 * precision * recall / (precision + recall)
+
+
+def _lcs_length(first: list[str], second: list[str]) -> int:
+    """最长公共子序列长度（逐行动态规划，只保留一行状态）"""
+    previous = [0] * (len(second) + 1)
+    for first_token in first:
+        current = [0]
+        for j, second_token in enumerate(second):
+            current.append(previous[j] + 1 if first_token == second_token else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def rouge_scores(candidate: str, reference: str) -> dict[str, float]:
+    """
+    计算候选文本相对参考文本的ROUGE-1、ROUGE-2和ROUGE-L F1值
+
+    Args:
+        candidate: 待评估的摘要
+        reference: 参考摘要
+
+    Returns:
+        {"rouge1", "rouge2", "rougeL"}
+    """
+    candidate_tokens = _rouge_tokens(candidate)
+    reference_tokens = _rouge_tokens(reference)
+    if not candidate_tokens or not reference_tokens:
+        return {"rouge1": 0.0, "rouge2": 0.0, "rougeL": 0.0}
+
+    scores = {}
+    for n in (1, 2):
+        candidate_ngrams = Counter(zip(*(candidate_tokens[i:] for i in range(n))))
+        reference_ngrams = Counter(zip(*(reference_tokens[i:] for i in range(n))))
+        overlap = sum((candidate_ngrams & reference_ngrams).values())
+        scores[f"rouge{n}"] = _f1(overlap, sum(candidate_ngrams.values()), sum(reference_ngrams.values()))
+
+    lcs = _lcs_length(candidate_tokens, reference_tokens)
+    scores["rougeL"] = _f1(lcs, len(candidate_tokens), len(reference_tokens))
+    return scores
+
+
+def _summarize_with_params(processor: TextProcessor, text: str, language: str, generation_params: dict) -> str:
+    """以指定的生成参数生成摘要（与推理时相同的输入窗口和语言前缀，不含短摘要回退）"""
+    encoded_input = processor.encode_input(text, language)
+    summary_ids = processor._generate_from_encoded(encoded_input, **generation_params)
+    summary = processor._decode(summary_ids[:1])[0]
+    summary_prefix, _ = processor._get_prefix_ids(language)
+    return summary[len(summary_prefix):].strip() if summary.startswith(summary_prefix) else summary
+
+
+def evaluate_model(model_path: str,
+                   file_paths: list[str],
+                   language: str = "en",
+                   seed: int = 0,
+                   generation_params: Optional[dict] = None) -> tuple[dict[str, float], list[str]]:
+    """
+    用指定模型为语料中的每个文件生成摘要，并测量速度与内存
+
+    Args:
+        model_path: 模型目录
+        file_paths: 语料文件列表
+        language: 文本语言代码
+        seed: 随机种子（推理时的生成参数启用了采样，每个文件使用相同种子，保证不同模型间可比）
+        generation_params: 传递给 model.generate 的生成参数；为None时使用推理时的采样参数（generate_summary）
+
+    Returns:
+        (指标字典, 每个文件的摘要列表；读取或生成失败的文件摘要为空字符串)
+    """
+    gc.collect()
+    rss_before = process_rss() or 0
+    processor = TextProcessor(model_path=model_path)
+    load_start = time.perf_counter()
+    processor.load_model()
+    load_seconds = time.perf_counter() - load_start
+    rss_loaded = process_rss() or 0
+
+    summaries = []
+    latencies = []
+    peak_rss = rss_loaded
+    start_time = time.perf_counter()
+    for file_path in file_paths:
+        file_start = time.perf_counter()
+        try:
+            file_content = processor.read_content(file_path, language)
+            torch.manual_seed(seed)
+            if generation_params is None:
+                summaries.append(processor.generate_summary(file_content, language=language))
+            else:
+                summaries.append(_summarize_with_params(processor, file_content, language, generation_params))
+        except Exception as error:
+            logger.error(f"评估文件失败: {file_path}, 错误: {str(error)}")
+            summaries.append("")
+        latencies.append(time.perf_counter() - file_start)
+        peak_rss = max(peak_rss, process_rss() or 0)
+    total_seconds = time.perf_counter() - start_time
+
+    latencies.sort()
+    metrics = {
+        "files": len(file_paths),
+        "parameters": sum(parameter.numel() for parameter in processor.model.parameters()),
+        "parameter_mb": sum(parameter.numel() * parameter.element_size()
+                            for parameter in processor.model.parameters()) / 1024 ** 2,
+        "load_seconds": load_seconds,
+        "load_rss_mb": (rss_loaded - rss_before) / 1024 ** 2,
+        "peak_rss_mb": peak_rss / 1024 ** 2,
+        "latency_mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "latency_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "files_per_second": len(file_paths) / total_seconds if total_seconds > 0 else 0.0
+    }
+
+    del processor
+    gc.collect()
+    return metrics, summaries
+
+
+def _mean_rouge(summaries: list[str], references: list[str]) -> dict[str, float]:
+    """计算摘要相对参考摘要的平均ROUGE（跳过参考为空的文件）"""
+    totals = Counter()
+    scored = 0
+    for summary, reference in zip(summaries, references):
+        if not reference:
+            continue
+        totals.update(rouge_scores(summary, reference))
+        scored += 1
+    return {name: totals[name] / scored if scored else 0.0 for name in ("rouge1", "rouge2", "rougeL")}
+
+
+def compare_models(teacher_path: str,
+                   student_paths: list[str],
+                   file_paths: list[str],
+                   language: str = "en",
+                   include_sampled: bool = False) -> dict[str, dict[str, float]]:
+    """
+    以教师模型的摘要为参考，评估各学生模型的ROUGE、延迟、内存和吞吐量
+    参考摘要与学生摘要均使用蒸馏训练目标的确定性束搜索参数生成，ROUGE与训练目标一致
+
+    Args:
+        teacher_path: 教师模型目录
+        student_paths: 学生模型目录列表
+        file_paths: 语料文件列表
+        language: 文本语言代码
+        include_sampled: 是否再以推理时的采样参数分别生成参考与学生摘要，
+                         结果记为 sampled_rouge1 / sampled_rouge2 / sampled_rougeL（评估耗时约加倍）
+
+    Returns:
+        模型目录 -> 指标字典
+    """
+    # distill 模块依赖本模块的 list_corpus，在函数内导入以避免循环导入
+    from distill import Distiller
+    target_params = Distiller.TARGET_GENERATION_PARAMS
+
+    logger.info(f"评估教师模型: {teacher_path} ({len(file_paths)} 个文件)")
+    teacher_metrics, references = evaluate_model(teacher_path, file_paths, language,
+                                                 generation_params=target_params)
+    sampled_references = evaluate_model(teacher_path, file_paths, language)[1] if include_sampled else None
+    results = {teacher_path: teacher_metrics}
+
+    for student_path in student_paths:
+        logger.info(f"评估学生模型: {student_path}")
+        metrics, summaries = evaluate_model(student_path, file_paths, language, generation_params=target_params)
+        metrics.update(_mean_rouge(summaries, references))
+        if sampled_references is not None:
+            sampled_summaries = evaluate_model(student_path, file_paths, language)[1]
+            metrics.update({f"sampled_{name}": score
+                            for name, score in _mean_rouge(sampled_summaries, sampled_references).items()})
+        metrics["speedup"] = (metrics["files_per_second"] / teacher_metrics["files_per_second"]
+                              if teacher_metrics["files_per_second"] else 0.0)
+        results[student_path] = metrics
+
+    return results
+
+
+if __name__ == "__main__":
+    """命令行入口：离线评估学生模型相对教师模型的质量与速度"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    parser = argparse.ArgumentParser(description="Summly 模型离线评估")
+    parser.add_argument("corpus_dir", help="评估语料目录")
+    parser.add_argument("students", nargs="+", help="待评估的学生模型目录")
+    parser.add_argument("--teacher", default=TextProcessor.DEFAULT_MODEL_PATH, help="教师模型目录（作为ROUGE参考）")
+    parser.add_argument("--language", default="en", help="语料的语言代码")
+    parser.add_argument("--limit", type=int, help="最多评估的文件数")
+    parser.add_argument("--output", help="将评估结果保存为JSON文件")
+    parser.add_argument("--sampled", action="store_true",
+                        help="同时以推理时的采样参数评估ROUGE（默认只使用确定性的束搜索参数）")
+    args = parser.parse_args()
+
+    corpus = list_corpus(args.corpus_dir, args.limit)
+    if not corpus:
+        parser.error(f"语料目录中没有支持的文件: {args.corpus_dir}")
+
+    evaluation_results = compare_models(args.teacher, args.students, corpus, args.language, args.sampled)
+    for path, result in evaluation_results.items():
+        rouge_text = (f"ROUGE-1 {result['rouge1']:.3f}  ROUGE-2 {result['rouge2']:.3f}  "
+                      f"ROUGE-L {result['rougeL']:.3f}  加速 {result['speedup']:.2f}x\n    "
+                      if "rouge1" in result else "（参考模型）\n    ")
+        if "sampled_rouge1" in result:
+            rouge_text += (f"采样生成 ROUGE-1 {result['sampled_rouge1']:.3f}  ROUGE-2 {result['sampled_rouge2']:.3f}  "
+                           f"ROUGE-L {result['sampled_rougeL']:.3f}\n    ")
+        print(f"{path}\n    {rouge_text}"
+              f"参数 {result['parameters'] / 1e6:.1f}M ({result['parameter_mb']:.0f} MB)  "
+              f"加载内存 {result['load_rss_mb']:.0f} MB  峰值内存 {result['peak_rss_mb']:.0f} MB\n    "
+              f"平均延迟 {result['latency_mean_ms']:.0f} ms  P95 {result['latency_p95_ms']:.0f} ms  "
+              f"吞吐量 {result['files_per_second']:.2f} 文件/秒")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(evaluation_results, f, ensure_ascii=False, indent=2)
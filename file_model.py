@@ -0,0 +1,187 @@
+import logging
+import os
+from array import array
+from typing import Optional
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+
+logger = logging.getLogger(__name__)
+
+
+class FileStateModel(QAbstractTableModel):
+    """
+    文件处理队列的数据模型
+    以紧凑数组保存每个文件的状态（路径、状态、结果），供虚拟化视图按需读取，
+    避免为每个文件创建独立的列表项对象
+    """
+    # 列定义：左侧队列显示文件名，右侧日志显示处理结果
+    COLUMN_NAME = 0
+    COLUMN_RESULT = 1
+
+    # 文件状态定义
+    STATUS_PENDING = 0
+    STATUS_PROCESSING = 1
+    STATUS_SUCCESS = 2
+    STATUS_ERROR = 3
+    STATUS_SUMMARIZED = 4  # 已生成摘要，等待批量重命名
+
+    STATUS_TEXTS = {
+        STATUS_PENDING: "等待处理...",
+        STATUS_PROCESSING: "处理中...",
+        STATUS_SUMMARIZED: "已生成摘要，等待重命名...",
+    }
+
+    STATUS_COLORS = {
+        STATUS_PENDING: QColor(Qt.GlobalColor.gray),
+        STATUS_PROCESSING: QColor(Qt.GlobalColor.gray),
+        STATUS_SUMMARIZED: QColor(Qt.GlobalColor.lightGray),
+        STATUS_SUCCESS: QColor(Qt.GlobalColor.white),
+        STATUS_ERROR: QColor(Qt.GlobalColor.red),
+    }
+
+    def __init__(self, parent=None):
+        """
+        初始化文件状态模型
+
+        Args:
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self._paths: list[str] = []  # 文件路径
+        self._statuses = array('B')  # 文件状态（每个文件1字节）
+        self._results: list[Optional[str]] = []  # 处理结果（成功为新文件名，失败为错误信息）
+        self._candidates: dict[int, list[tuple[str, float]]] = {}  # 候选文件名（仅候选模式下的行）
+        self._path_set: set[str] = set()  # 用于快速去重
+
+    # -------------------------- Qt模型接口 --------------------------
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self._paths)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return 2
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        status = self._statuses[row]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == self.COLUMN_NAME:
+                return os.path.basename(self._paths[row])
+            result = self._results[row]
+            return result if result is not None else self.STATUS_TEXTS.get(status, "")
+
+        if role == Qt.ItemDataRole.ToolTipRole:
+            candidates = self._candidates.get(row)
+            if index.column() == self.COLUMN_RESULT and candidates:
+                lines = [f"{number}. {name} ({score:.3f})" for number, (name, score) in enumerate(candidates, start=1)]
+                return "候选名称（右键切换）:\n" + "\n".join(lines)
+            return self._paths[row]
+
+        if role == Qt.ItemDataRole.ForegroundRole and index.column() == self.COLUMN_RESULT:
+            return self.STATUS_COLORS.get(status)
+
+        return None
+
+    # -------------------------- 数据操作 --------------------------
+    def contains(self, file_path: str) -> bool:
+        """判断文件是否已在队列中"""
+        return file_path in self._path_set
+
+    def file_paths(self) -> list[str]:
+        """返回队列中所有文件路径的副本"""
+        return self._paths.copy()
+
+    def candidates(self, row: int) -> list[tuple[str, float]]:
+        """返回指定行的候选文件名列表 (文件名, 得分)"""
+        return self._candidates.get(row, [])
+
+    def current_path(self, row: int) -> str:
+        """返回指定行文件当前在磁盘上的路径（成功重命名后为新路径）"""
+        if self._statuses[row] == self.STATUS_SUCCESS and self._results[row]:
+            return os.path.join(os.path.dirname(self._paths[row]), self._results[row])
+        return self._paths[row]
+
+    def add_files(self, file_paths: list[str]) -> int:
+        """
+        批量追加文件到队列（一次性通知视图，避免逐行插入的开销）
+
+        Args:
+            file_paths: 文件路径列表（调用方负责有效性检查）
+
+        Returns:
+            实际添加的文件数
+        """
+        new_paths = []
+        for file_path in file_paths:
+            if file_path not in self._path_set:
+                self._path_set.add(file_path)
+                new_paths.append(file_path)
+
+        if not new_paths:
+            return 0
+
+        first_row = len(self._paths)
+        self.beginInsertRows(QModelIndex(), first_row, first_row + len(new_paths) - 1)
+        self._paths.extend(new_paths)
+        self._statuses.extend([self.STATUS_PENDING] * len(new_paths))
+        self._results.extend([None] * len(new_paths))
+        self.endInsertRows()
+
+        logger.debug(f"模型新增 {len(new_paths)} 行，当前共 {len(self._paths)} 行")
+        return len(new_paths)
+
+    def mark_processing(self) -> None:
+        """将等待中或失败的文件标记为处理中"""
+        for row, status in enumerate(self._statuses):
+            if status in (self.STATUS_PENDING, self.STATUS_ERROR):
+                self._statuses[row] = self.STATUS_PROCESSING
+                self._results[row] = None
+        self._emit_rows_changed(0, len(self._paths) - 1)
+
+    def apply_updates(self, updates: list[tuple[int, Optional[bool], Optional[str], list[tuple[str, float]]]]) -> None:
+        """
+        批量应用处理结果，并合并为一次视图刷新
+
+        Args:
+            updates: (行号, 是否成功, 结果文本, 候选文件名列表) 元组列表；
+                     是否成功为None表示已生成摘要、等待重命名
+        """
+        if not updates:
+            return
+
+        first_row = len(self._paths)
+        last_row = -1
+        for row, succeeded, result, candidates in updates:
+            if not 0 <= row < len(self._paths):
+                logger.warning(f"进度更新失败：索引 {row} 超出模型范围")
+                continue
+            if succeeded is None:
+                self._statuses[row] = self.STATUS_SUMMARIZED
+            else:
+                self._statuses[row] = self.STATUS_SUCCESS if succeeded else self.STATUS_ERROR
+            self._results[row] = result
+            if candidates:
+                self._candidates[row] = candidates
+            else:
+                self._candidates.pop(row, None)
+            first_row = min(first_row, row)
+            last_row = max(last_row, row)
+
+        self._emit_rows_changed(first_row, last_row)
+
+    def _emit_rows_changed(self, first_row: int, last_row: int) -> None:
+        """通知视图指定行范围内的数据已变化"""
+        if first_row > last_row:
+            return
+        self.dataChanged.emit(
+            self.index(first_row, 0),
+            self.index(last_row, self.columnCount() - 1)
+        )
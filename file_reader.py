@@ -1,70 +1,389 @@
+import codecs
+import functools
+import io
 import logging
 import os
 import re
+import zipfile
+from html.parser import HTMLParser
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, Optional
+from xml.etree import ElementTree
 
 import olefile
-from docx import Document
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
 
+# 读取器类型：接收二进制流，惰性地逐段产出文本
+Reader = Callable[[BinaryIO], Iterator[str]]
+
+# Office Open XML 命名空间
+WORD_NAMESPACE = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+DRAWING_NAMESPACE = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+SHEET_NAMESPACE = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+# HTML中 <meta charset="..."> 或 <meta content="text/html; charset=..."> 声明的编码
+HTML_CHARSET_PATTERN = re.compile(rb'<meta[^>]*?charset\s*=\s*["\']?\s*([a-z0-9_.:-]+)', re.IGNORECASE)
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """提取HTML正文文本的解析器，忽略脚本和样式"""
+    SKIPPED_TAGS = {"script", "style", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: list[str] = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth > 0:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth == 0 and data.strip():
+            self.parts.append(data.strip())
+
 
 class FileReader:
+    """
+    通用文件读取器
+    根据内容特征（魔数）和文件后缀从注册表中选择读取器，
+    读取器以流的方式惰性产出文本，达到字符预算后立即停止解析
+    """
+    READ_BLOCK_SIZE = 64 * 1024
+    SNIFF_SIZE = 2048  # 内容嗅探读取的字节数
+    MAX_EMPTY_PDF_PAGES = 5  # PDF连续无文本页数上限（如扫描件），超过后停止解析
+    MAX_ARCHIVE_DEPTH = 2  # ZIP内嵌套压缩包的最大读取深度
+    TEXT_ENCODINGS = ("utf-8-sig", "gbk", "latin-1", "utf-16")  # 未声明编码时依次尝试的编码
+    # 网页中常见的编码别名：GB2312声明的页面实际常含GBK字符
+    ENCODING_ALIASES = {"gb2312": "gbk", "gb_2312": "gbk", "x-gbk": "gbk"}
+
+    # 读取器注册表：格式名 -> 读取器；后缀 -> 格式名
+    _readers: dict[str, Reader] = {}
+    _suffix_formats: dict[str, str] = {}
+
+    @classmethod
+    def register_reader(cls, format_name: str, reader: Reader, suffixes: tuple[str, ...] = ()) -> None:
+        """
+        注册文件读取器
+
+        Args:
+            format_name: 格式名称（内容嗅探的结果也使用此名称）
+            reader: 读取器，接收二进制流并逐段产出文本
+            suffixes: 该格式对应的文件后缀（小写，含点号）
+        """
+        cls._readers[format_name] = reader
+        for suffix in suffixes:
+            cls._suffix_formats[suffix] = format_name
+        logger.debug(f"注册读取器: {format_name} {list(suffixes)}")
+
+    @classmethod
+    def supported_suffixes(cls) -> list[str]:
+        """返回已注册的文件后缀列表"""
+        return sorted(cls._suffix_formats)
+
+    # -------------------------- 格式识别 --------------------------
     @staticmethod
-    def _read_txt(file_path: str) -> str:
-        """读取txt文件，自动检测编码"""
-        logger.info(f"开始读取文本文件: {file_path}")
-        encodings = ["utf-8", "gbk", "latin-1", "utf-16"]
+    def _sniff_container(stream: BinaryIO) -> str:
+        """根据ZIP容器中的成员判断Office Open XML文档类型"""
+        try:
+            with zipfile.ZipFile(stream) as archive:
+                names = set(archive.namelist())
+        except zipfile.BadZipFile:
+            return "zip"
+        finally:
+            stream.seek(0)
 
+        if "word/document.xml" in names:
+            return "docx"
+        if any(name.startswith("ppt/slides/") for name in names):
+            return "pptx"
+        if "xl/workbook.xml" in names:
+            return "xlsx"
+        return "zip"
+
+    @classmethod
+    def _detect_format(cls, stream: BinaryIO, suffix: str) -> Optional[str]:
+        """
+        识别文件格式：只处理已注册的后缀，再用魔数和文本内容区分后缀与实际格式不符的文件
+        （如扩展名为 .doc 的 docx、另存为 .txt 的网页）；未注册的后缀（.py、.json、无后缀等）一律不读取
+
+        Args:
+            stream: 可定位的二进制流
+            suffix: 文件后缀（小写）
+
+        Returns:
+            格式名称，无法识别时返回None
+        """
+        if suffix not in cls._suffix_formats:
+            return None
+
+        header = stream.read(cls.SNIFF_SIZE)
+        stream.seek(0)
+
+        if header.startswith(b"%PDF-"):
+            return "pdf"
+        if header.startswith(b"PK\x03\x04"):
+            return cls._sniff_container(stream)
+        if header.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+            return "doc"
+
+        file_format = cls._suffix_formats[suffix]
+        if file_format == "txt":
+            text_head = header.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+            if text_head.startswith((b"<!doctype html", b"<html")):
+                return "html"
+        return file_format
+
+    @classmethod
+    def _html_declared_encoding(cls, header: bytes) -> Optional[str]:
+        """
+        从HTML文件头的BOM或 <meta> 标签中识别声明的编码
+
+        Args:
+            header: 文件开头的字节
+
+        Returns:
+            编码名称，未声明或无法识别时返回None
+        """
+        if header.startswith(codecs.BOM_UTF8):
+            return "utf-8-sig"
+        if header.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            return "utf-16"
+
+        match = HTML_CHARSET_PATTERN.search(header)
+        if not match:
+            return None
+        declared = match.group(1).decode("ascii").lower()
+        try:
+            encoding = codecs.lookup(cls.ENCODING_ALIASES.get(declared, declared)).name
+        except LookupError:
+            logger.warning(f"HTML声明了无法识别的编码: {declared}")
+            return None
+        return cls.ENCODING_ALIASES.get(encoding, encoding)
+
+    @classmethod
+    def _decode_blocks(cls, stream: BinaryIO, first_block: bytes, encodings: list[str]) -> Iterator[str]:
+        """
+        依次尝试用候选编码解码首块，成功后沿用该编码流式解码其余数据块
+
+        Args:
+            stream: 已读出首块的二进制流
+            first_block: 首块数据
+            encodings: 按优先级排列的候选编码
+
+        Returns:
+            逐块产出的文本
+        """
         for encoding in encodings:
+            decoder = codecs.getincrementaldecoder(encoding)()
             try:
-                with open(file_path, "r", encoding=encoding) as f:
-                    content = f.read()
-                    logger.info(f"成功读取文件，使用编码: {encoding}")
-                    return content
+                text = decoder.decode(first_block, final=not first_block)
             except UnicodeDecodeError as ude:
                 logger.warning(f"编码 {encoding} 解码失败: {str(ude)}")
                 continue
 
-        raise ValueError(f"无法解码文件: {file_path}")
+            logger.info(f"成功识别文件编码: {encoding}")
+            yield text
 
-    @staticmethod
-    def _read_docx(file_path: str) -> str:
-        """读取docx格式的Word文档"""
-        logger.info(f"开始读取DOCX文件: {file_path}")
-        try:
-            doc = Document(file_path)
-            paragraphs = [paragraph.text for paragraph in doc.paragraphs]
-            return "\n".join(paragraphs)
-        except Exception as error:
-            logger.exception(f"读取DOCX文件失败: {str(error)}")
-            raise
+            # 后续数据块沿用已识别的编码，个别坏字节以替换符代替
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            decoder.decode(first_block)
+            for block in iter(lambda: stream.read(cls.READ_BLOCK_SIZE), b""):
+                yield decoder.decode(block)
+            yield decoder.decode(b"", final=True)
+            return
+
+        raise ValueError("无法解码文本内容")
+
+    # -------------------------- 内置读取器 --------------------------
+    @classmethod
+    def _read_txt(cls, stream: BinaryIO) -> Iterator[str]:
+        """流式读取文本文件，根据首块内容自动检测编码"""
+        logger.info("开始读取文本内容")
+        first_block = stream.read(cls.READ_BLOCK_SIZE)
+
+        if first_block.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+            encodings = ["utf-16"]
+        else:
+            encodings = list(cls.TEXT_ENCODINGS)
+        yield from cls._decode_blocks(stream, first_block, encodings)
 
     @staticmethod
-    def _read_doc(file_path: str) -> str:
-        """读取doc格式的Word文档"""
-        logger.info(f"开始读取DOC文件: {file_path}")
-        try:
-            with olefile.OleFileIO(file_path) as ole:
-                if not ole.exists('WordDocument'):
-                    raise ValueError("文件不是有效的Word文档")
+    def _read_docx(stream: BinaryIO) -> Iterator[str]:
+        """流式读取docx格式的Word文档，逐段落产出文本"""
+        logger.info("开始读取DOCX内容")
+        with zipfile.ZipFile(stream) as archive, archive.open("word/document.xml") as document:
+            for _, element in ElementTree.iterparse(document):
+                if element.tag == f"{WORD_NAMESPACE}p":
+                    paragraph = "".join(node.text or "" for node in element.iter(f"{WORD_NAMESPACE}t"))
+                    element.clear()
+                    yield paragraph + "\n"
 
-                doc_data = ole.openstream('WordDocument').read()
-                try:
-                    text = doc_data.decode('utf-16', errors='replace')
-                except UnicodeDecodeError:
-                    text = doc_data.decode('latin-1', errors='replace')
+    @classmethod
+    def _read_doc(cls, stream: BinaryIO) -> Iterator[str]:
+        """流式读取doc格式的Word文档"""
+        logger.info("开始读取DOC内容")
+        with olefile.OleFileIO(stream) as ole:
+            if not ole.exists('WordDocument'):
+                raise ValueError("文件不是有效的Word文档")
 
+            document = ole.openstream('WordDocument')
+            decoder = codecs.getincrementaldecoder('utf-16-le')(errors='replace')
+            for block in iter(lambda: document.read(cls.READ_BLOCK_SIZE), b""):
+                text = decoder.decode(block)
                 text = re.sub(r'\x00', '', text)  # 移除NUL字符
                 text = re.sub(r'\s+', ' ', text)  # 合并连续空格
-                return text.strip()
-        except Exception as error:
-            logger.exception(f"读取DOC文件失败: {str(error)}")
-            raise
+                yield text
+
+    @classmethod
+    def _read_pdf(cls, stream: BinaryIO) -> Iterator[str]:
+        """逐页读取PDF文本，连续多页无文本（如扫描件）时停止解析"""
+        logger.info("开始读取PDF内容")
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ValueError("读取PDF文件需要安装 pypdf")
+
+        reader = PdfReader(stream)
+        empty_pages = 0
+        for page_number, page in enumerate(reader.pages, start=1):
+            text = (page.extract_text() or "").strip()
+            if not text:
+                empty_pages += 1
+                if empty_pages >= cls.MAX_EMPTY_PDF_PAGES:
+                    logger.warning(f"PDF连续 {empty_pages} 页无可提取文本，停止解析 (第 {page_number} 页)")
+                    return
+                continue
+            empty_pages = 0
+            yield text + "\n"
+
+    @staticmethod
+    def _read_pptx(stream: BinaryIO) -> Iterator[str]:
+        """按幻灯片顺序流式读取pptx演示文稿文本"""
+        logger.info("开始读取PPTX内容")
+        slide_pattern = re.compile(r'ppt/slides/slide(\d+)\.xml$')
+        with zipfile.ZipFile(stream) as archive:
+            slides = sorted(
+                (int(match.group(1)), name)
+                for name in archive.namelist()
+                if (match := slide_pattern.match(name))
+            )
+            for _, slide_name in slides:
+                with archive.open(slide_name) as slide:
+                    for _, element in ElementTree.iterparse(slide):
+                        if element.tag == f"{DRAWING_NAMESPACE}p":
+                            paragraph = "".join(node.text or "" for node in element.iter(f"{DRAWING_NAMESPACE}t"))
+                            element.clear()
+                            if paragraph:
+                                yield paragraph + "\n"
+
+    @staticmethod
+    def _read_xlsx(stream: BinaryIO) -> Iterator[str]:
+        """按工作表顺序流式读取xlsx表格，逐行产出单元格文本"""
+        logger.info("开始读取XLSX内容")
+        sheet_pattern = re.compile(r'xl/worksheets/sheet(\d+)\.xml$')
+        with zipfile.ZipFile(stream) as archive:
+            # 共享字符串表
+            shared_strings = []
+            if "xl/sharedStrings.xml" in archive.namelist():
+                with archive.open("xl/sharedStrings.xml") as strings:
+                    for _, element in ElementTree.iterparse(strings):
+                        if element.tag == f"{SHEET_NAMESPACE}si":
+                            shared_strings.append("".join(node.text or "" for node in element.iter(f"{SHEET_NAMESPACE}t")))
+                            element.clear()
+
+            sheets = sorted(
+                (int(match.group(1)), name)
+                for name in archive.namelist()
+                if (match := sheet_pattern.match(name))
+            )
+            for _, sheet_name in sheets:
+                with archive.open(sheet_name) as sheet:
+                    row_values = []
+                    for _, element in ElementTree.iterparse(sheet):
+                        if element.tag == f"{SHEET_NAMESPACE}c":
+                            cell_type = element.get("t")
+                            if cell_type == "inlineStr":
+                                value = "".join(node.text or "" for node in element.iter(f"{SHEET_NAMESPACE}t"))
+                            else:
+                                value_node = element.find(f"{SHEET_NAMESPACE}v")
+                                value = value_node.text if value_node is not None and value_node.text else ""
+                                if cell_type == "s" and value.isdigit() and int(value) < len(shared_strings):
+                                    value = shared_strings[int(value)]
+                            if value:
+                                row_values.append(value)
+                        elif element.tag == f"{SHEET_NAMESPACE}row":
+                            if row_values:
+                                yield " ".join(row_values) + "\n"
+                            row_values = []
+                            element.clear()
+
+    @classmethod
+    def _read_html(cls, stream: BinaryIO) -> Iterator[str]:
+        """流式读取HTML正文文本"""
+        logger.info("开始读取HTML内容")
+        parser = _HTMLTextExtractor()
+        first_block = stream.read(cls.READ_BLOCK_SIZE)
 
-    def read_file(self, file_path: str) -> str:
-        """通用文件读取入口"""
+        # 优先使用BOM或 <meta> 声明的编码，解码失败时退回与纯文本相同的编码检测顺序
+        declared = cls._html_declared_encoding(first_block[:cls.SNIFF_SIZE])
+        encodings = [declared] if declared else []
+        encodings += [encoding for encoding in cls.TEXT_ENCODINGS if encoding != declared]
+
+        for text in cls._decode_blocks(stream, first_block, encodings):
+            parser.feed(text)
+            if parser.parts:
+                yield "\n".join(parser.parts) + "\n"
+                parser.parts.clear()
+        parser.close()
+        if parser.parts:
+            yield "\n".join(parser.parts) + "\n"
+
+    @classmethod
+    def _read_zip(cls, stream: BinaryIO, depth: int = 0) -> Iterator[str]:
+        """直接在压缩包内读取各成员文档，不解压到磁盘"""
+        logger.info("开始读取ZIP压缩包内容")
+        with zipfile.ZipFile(stream) as archive:
+            for member in archive.infolist():
+                if member.is_dir():
+                    continue
+                with archive.open(member) as member_stream:
+                    member_format = cls._detect_format(member_stream, Path(member.filename).suffix.lower())
+                    if member_format == "zip":
+                        if depth + 1 >= cls.MAX_ARCHIVE_DEPTH:
+                            logger.warning(f"压缩包嵌套过深，跳过: {member.filename}")
+                            continue
+                        reader = functools.partial(cls._read_zip, depth=depth + 1)
+                    elif member_format in cls._readers:
+                        reader = cls._readers[member_format]
+                    else:
+                        logger.debug(f"跳过不支持的压缩包成员: {member.filename}")
+                        continue
+
+                    logger.info(f"读取压缩包成员: {member.filename} ({member_format})")
+                    try:
+                        yield from reader(member_stream)
+                    except Exception as error:
+                        logger.warning(f"读取压缩包成员失败，跳过: {member.filename}, 错误: {str(error)}")
+
+    # -------------------------- 读取入口 --------------------------
+    def read_file(self, file_path: str, max_chars: Optional[int] = None) -> str:
+        """
+        通用文件读取入口
+
+        Args:
+            file_path: 文件路径
+            max_chars: 最多读取的字符数，达到后停止解析；为None时读取全部内容
+
+        Returns:
+            提取的文本
+        """
         logger.info(f"开始读取文件: {file_path}")
 
         if not os.path.exists(file_path):
@@ -73,18 +392,44 @@ class FileReader:
         suffix = Path(file_path).suffix.lower()
         logger.debug(f"文件后缀: {suffix}")
 
-        # 使用Python 3.12的match语句替代多分支if-else
-        match suffix:
-            case '.txt':
-                logger.info("识别为文本文件，调用文本读取方法")
-                return self._read_txt(file_path)
-            case '.docx':
-                logger.info("识别为Word文档(.docx)，调用DOCX读取方法")
-                return self._read_docx(file_path)
-            case '.doc':
-                logger.info("识别为Word文档(.doc)，调用DOC读取方法")
-                return self._read_doc(file_path)
-            case _:
-                supported_types = ['.txt', '.docx', '.doc']
+        with open(file_path, "rb") as stream:
+            file_format = self._detect_format(stream, suffix)
+            if file_format not in self._readers:
+                supported_types = self.supported_suffixes()
                 logger.error(f"不支持的文件类型: {suffix}，支持的类型: {supported_types}")
                 raise ValueError(f"不支持的文件类型: {suffix}")
+
+            logger.info(f"识别为 {file_format} 格式，调用对应读取器")
+            try:
+                return self._collect(self._readers[file_format](stream), max_chars)
+            except Exception as error:
+                logger.exception(f"读取{file_format}文件失败: {str(error)}")
+                raise
+
+    @staticmethod
+    def _collect(pieces: Iterator[str], max_chars: Optional[int]) -> str:
+        """拼接读取器产出的文本，达到字符预算后关闭读取器以停止解析"""
+        buffer = io.StringIO()
+        total_chars = 0
+        try:
+            for piece in pieces:
+                buffer.write(piece)
+                total_chars += len(piece)
+                if max_chars is not None and total_chars >= max_chars:
+                    logger.info(f"已达到字符预算 ({max_chars})，停止读取")
+                    break
+        finally:
+            pieces.close()
+
+        text = buffer.getvalue()
+        return text if max_chars is None else text[:max_chars]
+
+
+FileReader.register_reader("txt", FileReader._read_txt, (".txt", ".md", ".csv", ".log"))
+FileReader.register_reader("docx", FileReader._read_docx, (".docx",))
+FileReader.register_reader("doc", FileReader._read_doc, (".doc",))
+FileReader.register_reader("pdf", FileReader._read_pdf, (".pdf",))
+FileReader.register_reader("pptx", FileReader._read_pptx, (".pptx",))
+FileReader.register_reader("xlsx", FileReader._read_xlsx, (".xlsx",))
+FileReader.register_reader("html", FileReader._read_html, (".html", ".htm"))
+FileReader.register_reader("zip", FileReader._read_zip, (".zip",))
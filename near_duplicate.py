@@ -0,0 +1,215 @@
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NearDuplicateIndex:
+    """
+    基于MinHash + LSH的近似重复文本索引
+    对提取文本的字符k-gram做MinHash签名，并按band分桶；
+    查询时只比较同桶的候选，命中阈值即可复用已生成的摘要，跳过模型推理
+    """
+    DEFAULT_STORE_PATH = "cache/near_duplicates.npz"
+
+    DEFAULT_THRESHOLD = 0.85  # 默认Jaccard相似度阈值
+    NUM_PERMUTATIONS = 128  # MinHash签名长度
+    SHINGLE_SIZE = 5  # 字符k-gram长度（按字符切分，兼容中日韩等无空格文本）
+    MIN_SHINGLES = 20  # 参与签名的最少k-gram数，更短的文本（如空白或扫描件）不做近似重复判定
+    MAX_TEXT_CHARS = 20000  # 参与签名的最大字符数，与模型实际读取的文本范围同一量级
+    HASH_BLOCK_SIZE = 4096  # 分块计算签名，限制中间矩阵的内存占用
+
+    _ROLLING_HASH_BASE = np.uint64(1000003)
+    _whitespace_pattern = re.compile(r'\s+')
+
+    def __init__(self,
+                 threshold: float = DEFAULT_THRESHOLD,
+                 store_path: Optional[str] = None,
+                 seed: int = 1):
+        """
+        初始化近似重复索引
+
+        Args:
+            threshold: 判定为近似重复的Jaccard相似度阈值（0~1）
+            store_path: 持久化文件路径，为None时仅在内存中使用
+            seed: 哈希函数的随机种子（持久化的索引必须使用相同的种子）
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"相似度阈值必须在 (0, 1] 范围内: {threshold}")
+
+        self.threshold = threshold
+        self.store_path = store_path
+        self.seed = seed
+
+        # 通用哈希 (a * x + b) >> 32 的参数，a为奇数
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, 2 ** 63, size=self.NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+        self._hash_b = rng.integers(0, 2 ** 63, size=self.NUM_PERMUTATIONS, dtype=np.uint64)
+
+        self.bands, self.rows = self._choose_band_layout(threshold, self.NUM_PERMUTATIONS)
+        logger.info(f"近似重复索引: 阈值 {threshold}, LSH分桶 {self.bands} 段 x {self.rows} 行")
+
+        # 索引数据
+        self._signatures: list[np.ndarray] = []
+        self._payloads: list[list[tuple[str, float]]] = []  # 每个条目对应的文件名候选 (文件名, 得分)
+        self._summaries: list[Optional[str]] = []  # 每个条目对应的原始摘要（旧版索引中的条目为None）
+        self._buckets: list[dict[bytes, list[int]]] = [{} for _ in range(self.bands)]
+
+        if store_path and os.path.exists(store_path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def _choose_band_layout(threshold: float, num_permutations: int) -> tuple[int, int]:
+        """
+        选择LSH的分段数和每段行数，使S曲线的拐点 (1/b)^(1/r) 略低于阈值
+        （宁可多召回候选，再用签名相似度精确过滤）
+
+        Returns:
+            (分段数, 每段行数)
+        """
+        target = threshold * 0.9
+        layouts = [
+            (num_permutations // rows, rows)
+            for rows in range(1, num_permutations + 1)
+            if num_permutations % rows == 0
+        ]
+        return min(layouts, key=lambda layout: abs((1 / layout[0]) ** (1 / layout[1]) - target))
+
+    # -------------------------- 签名 --------------------------
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """
+        计算文本的MinHash签名
+
+        Args:
+            text: 提取的文档文本
+
+        Returns:
+            长度为 NUM_PERMUTATIONS 的 uint64 签名；文本不足 MIN_SHINGLES 个k-gram时返回None
+        """
+        normalized = self._whitespace_pattern.sub(' ', text[:self.MAX_TEXT_CHARS]).strip().lower()
+        codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+        # 向量化的多项式滚动哈希，得到每个字符k-gram的64位哈希（溢出按2^64取模）
+        shingle_count = len(codes) - self.SHINGLE_SIZE + 1
+        if shingle_count < self.MIN_SHINGLES:
+            return None
+        shingles = np.zeros(shingle_count, dtype=np.uint64)
+        for offset in range(self.SHINGLE_SIZE):
+            shingles = shingles * self._ROLLING_HASH_BASE + codes[offset:offset + shingle_count]
+        shingles = np.unique(shingles)
+
+        # 对每个哈希函数取所有k-gram哈希的最小值
+        signature = np.full(self.NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), self.HASH_BLOCK_SIZE):
+            block = shingles[start:start + self.HASH_BLOCK_SIZE]
+            hashed = (self._hash_a[:, None] * block[None, :] + self._hash_b[:, None]) >> np.uint64(32)
+            np.minimum(signature, hashed.min(axis=1), out=signature)
+        return signature
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """根据两个MinHash签名估计Jaccard相似度"""
+        return float(np.mean(first == second))
+
+    # -------------------------- 查询与写入 --------------------------
+    def _band_keys(self, signature: np.ndarray) -> list[bytes]:
+        """计算签名在各分段中的桶键"""
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def query(self, signature: np.ndarray) -> Optional[tuple[list[tuple[str, float]], Optional[str], float]]:
+        """
+        查找与签名最相似且超过阈值的已索引文本
+
+        Args:
+            signature: signature() 返回的签名
+
+        Returns:
+            (文件名候选列表, 原始摘要, 估计相似度)，没有近似重复时返回None
+        """
+        candidate_ids = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidate_ids.update(self._buckets[band].get(key, ()))
+
+        if not candidate_ids:
+            return None
+
+        # 对同桶候选一次性计算签名相似度
+        ids = np.fromiter(candidate_ids, dtype=np.int64)
+        similarities = np.mean(np.stack([self._signatures[i] for i in ids]) == signature, axis=1)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            return None
+
+        logger.info(f"发现近似重复文本 (相似度: {similarities[best]:.3f}, 候选数: {len(ids)})")
+        entry_id = int(ids[best])
+        return self._payloads[entry_id], self._summaries[entry_id], float(similarities[best])
+
+    def add(self, signature: np.ndarray, candidates: list[tuple[str, float]], summary: Optional[str] = None) -> None:
+        """
+        将文本签名及其生成的文件名加入索引
+
+        Args:
+            signature: signature() 返回的签名
+            candidates: 文件名候选列表 (文件名, 得分)，第一个为首选
+            summary: 模型生成的原始摘要
+        """
+        entry_id = len(self._signatures)
+        self._signatures.append(signature)
+        self._payloads.append([(name, float(score)) for name, score in candidates])
+        self._summaries.append(summary)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(entry_id)
+
+    # -------------------------- 持久化 --------------------------
+    def save(self) -> None:
+        """将索引保存到 store_path"""
+        if not self.store_path:
+            return
+
+        directory = os.path.dirname(self.store_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        signatures = (np.stack(self._signatures) if self._signatures
+                      else np.empty((0, self.NUM_PERMUTATIONS), dtype=np.uint64))
+        payloads = np.array([json.dumps(payload, ensure_ascii=False) for payload in self._payloads], dtype=str)
+        summaries = np.array([json.dumps(summary, ensure_ascii=False) for summary in self._summaries], dtype=str)
+
+        # 先写临时文件再替换，避免中途退出损坏已有索引
+        temp_path = self.store_path + ".tmp.npz"
+        np.savez_compressed(temp_path, signatures=signatures, payloads=payloads, summaries=summaries,
+                            seed=np.int64(self.seed), shingle_size=np.int64(self.SHINGLE_SIZE))
+        os.replace(temp_path, self.store_path)
+        logger.info(f"近似重复索引已保存: {self.store_path} ({len(self)} 条)")
+
+    def load(self) -> None:
+        """从 store_path 加载索引，参数不兼容或文件损坏时忽略已有数据"""
+        try:
+            with np.load(self.store_path) as data:
+                if (int(data["seed"]) != self.seed or int(data["shingle_size"]) != self.SHINGLE_SIZE
+                        or data["signatures"].shape[1:] != (self.NUM_PERMUTATIONS,)):
+                    logger.warning(f"近似重复索引参数不兼容，忽略: {self.store_path}")
+                    return
+                signatures = data["signatures"]
+                payloads = [json.loads(payload) for payload in data["payloads"]]
+                # 旧版索引没有保存原始摘要
+                summaries = ([json.loads(summary) for summary in data["summaries"]]
+                             if "summaries" in data.files else [None] * len(payloads))
+        except Exception as error:
+            logger.warning(f"加载近似重复索引失败，忽略: {str(error)}")
+            return
+
+        for signature, payload, summary in zip(signatures, payloads, summaries):
+            self.add(signature, [(name, score) for name, score in payload], summary)
+        logger.info(f"近似重复索引已加载: {self.store_path} ({len(self)} 条)")
@@ -1,11 +1,19 @@
+import hashlib
+import json
 import logging
+import math
+import os
 import re
-from typing import Optional
+from typing import Optional, Union
 
+import numpy as np
 import torch
-from transformers import MT5ForConditionalGeneration, T5Tokenizer
+from transformers import MT5ForConditionalGeneration, T5Tokenizer, T5TokenizerFast
+from transformers.modeling_outputs import BaseModelOutput
 
+from accelerated import AcceleratedInference
 from file_reader import FileReader
+from near_duplicate import NearDuplicateIndex
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +22,12 @@ class TextProcessor:
     """
     文本处理引擎，支持多语言文本摘要和文件处理
     """
+    # 默认模型目录
+    DEFAULT_MODEL_PATH = "models/mt5-small"
+
+    # 裁剪词表的学生模型目录中的词表映射文件：列表第i项为学生模型token i对应的教师（原分词器）token
+    VOCAB_MAP_FILENAME = "vocab_map.json"
+
     # 定义需要从文件名中移除的特殊字符集合
     # 包含操作系统不允许的字符及可能引起问题的符号
     FILENAME_SPECIAL_CHARS = r'[\/:*?"<>|%#$@!^&()\[\]{};`,.~+=。，？！]'
@@ -32,19 +46,65 @@ class TextProcessor:
         "it": "riassumi in italiano: "
     }
 
-    def __init__(self):
+    # 模型输入的最大token数
+    MAX_INPUT_TOKENS = 512
+
+    # 各语言每个token平均对应的字符数初始估计，运行中根据实际编码结果持续修正
+    DEFAULT_CHARS_PER_TOKEN = 4.0
+    CHARS_PER_TOKEN_ESTIMATES = {
+        "zh": 1.5,
+        "ja": 1.5,
+        "ko": 2.0,
+        "ru": 3.5,
+        "ar": 3.5
+    }
+
+    # 字符窗口相对估计值的放大系数，保证窗口通常足以填满token预算
+    CHAR_WINDOW_MARGIN = 1.25
+
+    # 字符/token估计值的滑动平均系数
+    CHARS_PER_TOKEN_SMOOTHING = 0.2
+
+    def __init__(self,
+                 near_duplicate_index: Optional[NearDuplicateIndex] = None,
+                 near_duplicate_suffix: bool = False,
+                 accelerated: bool = False,
+                 model_path: str = DEFAULT_MODEL_PATH,
+                 measure_speedup: bool = False):
         """
         初始化文本处理器
+
+        Args:
+            near_duplicate_index: 可选的近似重复索引；命中时复用已有文件名，跳过模型推理
+            near_duplicate_suffix: 复用近似重复文件名时是否追加基于内容哈希的区分后缀
+            accelerated: 是否启用分桶编译的加速推理（模型加载后在后台预热）
+            model_path: 模型目录，可以是 mt5-small 或 distill.py 生成的学生模型
+            measure_speedup: 加速推理预热后是否测量各长度桶完整生成的端到端加速比（会占用额外的计算资源）
         """
         logger.info("初始化文本处理器")
 
         # 模型相关组件
         self.model: Optional[MT5ForConditionalGeneration] = None
-        self.tokenizer: Optional[T5Tokenizer] = None
+        self.tokenizer: Optional[Union[T5TokenizerFast, T5Tokenizer]] = None
         self.device: Optional[str] = None
+        self.model_path = model_path
+        self.accelerated = accelerated
+        self.measure_speedup = measure_speedup
+        self.accelerator: Optional[AcceleratedInference] = None
+        self.generation_count = 0  # 模型生成的累计次数（调用方据此区分实际运行了模型的文件）
+
+        # 裁剪词表的学生模型：分词器仍使用教师词表，输入输出在两种token编号之间映射
+        self._vocab_map: Optional[torch.Tensor] = None  # 学生token -> 教师token
+        self._teacher_to_student: Optional[torch.Tensor] = None  # 教师token -> 学生token
+
+        # 输入准备相关状态
+        self._prefix_ids: dict[str, list[int]] = {}  # 各语言提示前缀的token缓存
+        self._chars_per_token: dict[str, float] = dict(self.CHARS_PER_TOKEN_ESTIMATES)
 
         # 文件处理组件
         self.file_reader = FileReader()
+        self.near_duplicate_index = near_duplicate_index
+        self.near_duplicate_suffix = near_duplicate_suffix
 
         # 编译正则表达式模式，提高性能
         self.special_chars_pattern = re.compile(self.FILENAME_SPECIAL_CHARS)
@@ -54,21 +114,27 @@ class TextProcessor:
 
     def load_model(self) -> None:
         """
-        加载预训练的mT5模型和分词器
-        如果模型已加载，则跳过此步骤
+        加载 model_path 下的mT5模型和分词器
+        目录中包含 vocab_map.json 时按裁剪词表的学生模型加载；如果模型已加载，则跳过此步骤
         """
         if self.model is not None and self.tokenizer is not None:
             logger.info("模型和分词器已加载，跳过重复加载")
             return
 
         logger.info("开始加载模型和分词器")
-        model_path = "models/mt5-small"
+        model_path = self.model_path
 
         try:
-            # 加载分词器
+            # 加载分词器，优先使用基于Rust的快速分词器
             logger.debug(f"从路径加载分词器: {model_path}")
-            self.tokenizer = T5Tokenizer.from_pretrained(model_path, legacy=False)
-            logger.info("分词器加载成功")
+            try:
+                self.tokenizer = T5TokenizerFast.from_pretrained(model_path, legacy=False)
+                logger.info("快速分词器加载成功")
+            except Exception as fast_error:
+                logger.warning(f"快速分词器不可用，回退到SentencePiece分词器: {str(fast_error)}")
+                self.tokenizer = T5Tokenizer.from_pretrained(model_path, legacy=False)
+                logger.info("分词器加载成功")
+            self._prefix_ids.clear()
 
             # 加载模型
             logger.debug(f"从路径加载模型: {model_path}")
@@ -83,10 +149,66 @@ class TextProcessor:
             self.model.to(self.device)
             logger.info(f"模型已成功加载到设备: {self.device}")
 
+            self._load_vocab_map(model_path)
+
+            # 启用加速推理时在后台编译并预热各长度桶
+            if self.accelerated:
+                self.accelerator = AcceleratedInference(self.model, self.device, self.tokenizer.pad_token_id,
+                                                        measure_generation=self.measure_speedup)
+                self.accelerator.start_warmup()
+
         except Exception as error:
             logger.exception(f"模型加载失败: {str(error)}")
             raise RuntimeError(f"模型加载失败: {str(error)}")
 
+    def _load_vocab_map(self, model_path: str) -> None:
+        """
+        加载学生模型的词表映射；模型目录中没有映射文件时使用原词表
+
+        Args:
+            model_path: 模型目录
+        """
+        self._vocab_map = None
+        self._teacher_to_student = None
+
+        vocab_map_path = os.path.join(model_path, self.VOCAB_MAP_FILENAME)
+        if not os.path.exists(vocab_map_path):
+            return
+
+        with open(vocab_map_path, "r", encoding="utf-8") as f:
+            vocab_map = json.load(f)
+        if len(vocab_map) != self.model.config.vocab_size:
+            raise ValueError(f"词表映射大小 ({len(vocab_map)}) 与模型词表大小 ({self.model.config.vocab_size}) 不一致")
+
+        # 特殊token在两种编号下必须相同，生成参数和填充才能直接沿用分词器的设置
+        for token_id in (self.tokenizer.pad_token_id, self.tokenizer.eos_token_id, self.tokenizer.unk_token_id):
+            if token_id >= len(vocab_map) or vocab_map[token_id] != token_id:
+                raise ValueError(f"词表映射必须保持特殊token编号不变: {token_id}")
+
+        self._vocab_map = torch.tensor(vocab_map, dtype=torch.long, device=self.device)
+        self._teacher_to_student = torch.full((len(self.tokenizer),), self.tokenizer.unk_token_id,
+                                              dtype=torch.long, device=self.device)
+        self._teacher_to_student[self._vocab_map] = torch.arange(len(vocab_map), device=self.device)
+        logger.info(f"使用裁剪词表: {len(vocab_map)}/{len(self.tokenizer)} 个token")
+
+    def _decode(self, sequences: torch.Tensor) -> list[str]:
+        """
+        将生成的token序列解码为文本（学生模型的token先映射回分词器词表）
+
+        Args:
+            sequences: model.generate 输出的token序列
+
+        Returns:
+            每个序列对应的文本
+        """
+        if self._vocab_map is not None:
+            sequences = self._vocab_map[sequences]
+        return self.tokenizer.batch_decode(
+            sequences,
+            skip_special_tokens=True,
+            clean_up_tokenization_spaces=True
+        )
+
     def clean_filename(self, text: str) -> str:
         """
         清理文本，移除或替换可能影响文件命名的特殊字符
@@ -117,11 +239,169 @@ class TextProcessor:
         logger.debug(f"清理后: 文本长度 {len(cleaned_text)}")
         return cleaned_text
 
+    def input_char_budget(self, language: str = "en") -> int:
+        """
+        估算填满模型输入所需的文本字符数
+
+        Args:
+            language: 文本语言代码
+
+        Returns:
+            字符窗口大小
+        """
+        chars_per_token = self._chars_per_token.get(language, self.DEFAULT_CHARS_PER_TOKEN)
+        return math.ceil(self.MAX_INPUT_TOKENS * chars_per_token * self.CHAR_WINDOW_MARGIN)
+
+    def _get_prefix_ids(self, language: str) -> tuple[str, list[int]]:
+        """
+        获取语言提示前缀及其token（每种语言只编码一次）
+
+        Args:
+            language: 文本语言代码
+
+        Returns:
+            (提示前缀, 前缀token列表)
+        """
+        if language not in self.LANGUAGE_PREFIXES:
+            language = "en"
+        summary_prefix = self.LANGUAGE_PREFIXES[language]
+
+        if language not in self._prefix_ids:
+            self._prefix_ids[language] = self.tokenizer(summary_prefix, add_special_tokens=False)["input_ids"]
+            logger.debug(f"缓存语言前缀token (语言: {language}, token数: {len(self._prefix_ids[language])})")
+        return summary_prefix, self._prefix_ids[language]
+
+    def _prepare_input(self, text: str, language: str) -> dict[str, torch.Tensor]:
+        """
+        构建模型输入：只对有限的字符窗口分词，使分词开销与文档大小无关
+
+        Args:
+            text: 原始文本
+            language: 文本语言代码
+
+        Returns:
+            包含 input_ids 和 attention_mask 的字典
+        """
+        _, prefix_ids = self._get_prefix_ids(language)
+        token_budget = self.MAX_INPUT_TOKENS - len(prefix_ids) - 1  # 预留结束符
+
+        window = self.input_char_budget(language)
+        text_window = text[:window]
+        text_ids = self.tokenizer(text_window, add_special_tokens=False)["input_ids"]
+
+        # 估计偏高导致窗口不足以填满预算时，扩大窗口重试一次
+        if len(text_ids) < token_budget and len(text_window) < len(text):
+            text_window = text[:window * 2]
+            text_ids = self.tokenizer(text_window, add_special_tokens=False)["input_ids"]
+
+        # 根据本次编码结果修正该语言的字符/token估计
+        if len(text_ids) >= 32:
+            observed = len(text_window) / len(text_ids)
+            estimate = self._chars_per_token.get(language, self.DEFAULT_CHARS_PER_TOKEN)
+            smoothing = self.CHARS_PER_TOKEN_SMOOTHING
+            self._chars_per_token[language] = (1 - smoothing) * estimate + smoothing * observed
+
+        input_ids = prefix_ids + text_ids[:token_budget] + [self.tokenizer.eos_token_id]
+        logger.debug(f"输入窗口: {len(text_window)}/{len(text)} 字符, {len(input_ids)} token")
+
+        input_tensor = torch.tensor([input_ids], dtype=torch.long, device=self.device)
+        if self._teacher_to_student is not None:
+            input_tensor = self._teacher_to_student[input_tensor]
+        return {
+            "input_ids": input_tensor,
+            "attention_mask": torch.ones_like(input_tensor)
+        }
+
+    def encode_input(self, text: str, language: str = "en") -> dict[str, torch.Tensor]:
+        """
+        编码输入文本并运行一次编码器，结果可供多次解码复用
+
+        Args:
+            text: 原始文本
+            language: 文本语言代码
+
+        Returns:
+            包含 encoder_hidden_states 和 attention_mask 的字典
+        """
+        self.load_model()
+
+        input_encoding = self._prepare_input(text, language)
+        logger.info(f"文本编码完成 (input_ids 形状: {input_encoding['input_ids'].shape})")
+
+        if self.accelerator is not None:
+            # 填充到固定长度桶后使用编译的编码器
+            encoder_hidden_states, attention_mask = self.accelerator.encode(
+                input_encoding["input_ids"],
+                input_encoding["attention_mask"]
+            )
+        else:
+            with torch.no_grad():
+                encoder_outputs = self.model.get_encoder()(
+                    input_ids=input_encoding["input_ids"],
+                    attention_mask=input_encoding["attention_mask"],
+                    return_dict=True
+                )
+            encoder_hidden_states = encoder_outputs.last_hidden_state
+            attention_mask = input_encoding["attention_mask"]
+        logger.debug("编码器前向计算完成")
+
+        return {
+            "encoder_hidden_states": encoder_hidden_states,
+            "attention_mask": attention_mask
+        }
+
+    def _generate_from_encoded(self, encoded_input: dict[str, torch.Tensor], **generation_params):
+        """
+        基于已有的编码器输出解码，不重复运行编码器
+
+        Args:
+            encoded_input: encode_input 的返回值
+            generation_params: 传递给 model.generate 的生成参数
+
+        Returns:
+            model.generate 的输出
+        """
+        # generate 在束搜索时会原地扩展 encoder_outputs，因此每次调用都包装一个新对象
+        encoder_outputs = BaseModelOutput(last_hidden_state=encoded_input["encoder_hidden_states"])
+        self.generation_count += 1
+        with torch.no_grad():
+            return self.model.generate(
+                encoder_outputs=encoder_outputs,
+                attention_mask=encoded_input["attention_mask"],
+                **generation_params
+            )
+
+    @staticmethod
+    def _beam_generation_params(max_length: int, min_length: int, num_beams: int = 4) -> dict:
+        """
+        构建束搜索摘要的生成参数
+
+        Args:
+            max_length: 摘要的最大长度（token数）
+            min_length: 摘要的最小长度（token数）
+            num_beams: 束搜索宽度
+
+        Returns:
+            生成参数字典
+        """
+        return {
+            "max_length": max_length,
+            "min_length": min_length,
+            "num_beams": num_beams,  # 束搜索宽度
+            "early_stopping": True,  # 达到最小长度后可提前停止
+            "no_repeat_ngram_size": 3,  # 避免重复3-gram
+            "length_penalty": 2.0,  # 倾向于生成中等长度的摘要
+            "repetition_penalty": 1.5,  # 减少重复生成的惩罚因子
+            "temperature": 0.7,  # 控制生成的随机性
+            "do_sample": True  # 使用采样生成
+        }
+
     def generate_summary(self,
                          text: str,
                          max_length: int = 30,
                          min_length: int = 10,
-                         language: str = "en") -> str:
+                         language: str = "en",
+                         encoded_input: Optional[dict[str, torch.Tensor]] = None) -> str:
         """
         使用mT5模型生成文本摘要
 
@@ -130,6 +410,7 @@ class TextProcessor:
             max_length: 摘要的最大长度（token数）
             min_length: 摘要的最小长度（token数）
             language: 文本语言代码（如"en"、"zh"等）
+            encoded_input: 可选，encode_input 的返回值；提供时直接复用，不再重新编码
 
         Returns:
             生成的摘要文本
@@ -139,56 +420,30 @@ class TextProcessor:
         # 确保模型已加载
         self.load_model()
 
-        # 获取语言特定的提示前缀
-        summary_prefix = self.LANGUAGE_PREFIXES.get(language, self.LANGUAGE_PREFIXES["en"])
-        logger.info(f"使用语言前缀: '{summary_prefix}'")
-
-        # 构建带前缀的输入文本
-        input_text = summary_prefix + text
-        logger.debug(f"构建输入文本 (总长度: {len(input_text)} 字符)")
-
         try:
-            # 编码输入文本
-            logger.info("开始编码输入文本")
-            input_encoding = self.tokenizer(
-                input_text,
-                max_length=512,
-                truncation=True,
-                return_tensors="pt"
-            ).to(self.device)
-            logger.info(f"文本编码完成 (input_ids 形状: {input_encoding['input_ids'].shape})")
+            # 获取语言特定的提示前缀
+            summary_prefix, _ = self._get_prefix_ids(language)
+            logger.info(f"使用语言前缀: '{summary_prefix}'")
+
+            # 编码输入文本（编码器输出在本次调用的所有解码中复用）
+            if encoded_input is None:
+                logger.info("开始编码输入文本")
+                encoded_input = self.encode_input(text, language)
+            else:
+                logger.info("复用已有的编码器输出")
 
             # 配置生成参数
-            generation_params = {
-                "max_length": max_length,
-                "min_length": min_length,
-                "num_beams": 4,  # 束搜索宽度
-                "early_stopping": True,  # 达到最小长度后可提前停止
-                "no_repeat_ngram_size": 3,  # 避免重复3-gram
-                "length_penalty": 2.0,  # 倾向于生成中等长度的摘要
-                "repetition_penalty": 1.5,  # 减少重复生成的惩罚因子
-                "temperature": 0.7,  # 控制生成的随机性
-                "do_sample": True  # 使用采样生成
-            }
+            generation_params = self._beam_generation_params(max_length, min_length)
             logger.debug(f"摘要生成参数: {generation_params}")
 
             # 生成摘要
             logger.info("开始模型摘要生成")
-            with torch.no_grad():
-                summary_ids = self.model.generate(
-                    input_ids=input_encoding["input_ids"],
-                    attention_mask=input_encoding["attention_mask"],
-                    **generation_params
-                )
+            summary_ids = self._generate_from_encoded(encoded_input, **generation_params)
             logger.info("摘要生成完成")
 
             # 解码生成的摘要
             logger.info("开始解码生成的摘要")
-            raw_summary = self.tokenizer.decode(
-                summary_ids[0],
-                skip_special_tokens=True,
-                clean_up_tokenization_spaces=True
-            )
+            raw_summary = self._decode(summary_ids[:1])[0]
             logger.debug(f"原始解码摘要: '{raw_summary}' (长度: {len(raw_summary)} 字符)")
 
             # 移除提示前缀（如果存在）
@@ -205,22 +460,16 @@ class TextProcessor:
             if word_count < 3:
                 logger.warning(f"摘要过短 (仅 {word_count} 词)，启动回退机制")
                 try:
-                    # 使用简化参数重新生成
-                    with torch.no_grad():
-                        fallback_ids = self.model.generate(
-                            input_ids=input_encoding["input_ids"],
-                            attention_mask=input_encoding["attention_mask"],
-                            max_length=max_length,
-                            num_beams=1,  # 禁用束搜索，使用贪心解码
-                            early_stopping=True
-                        )
-
-                    fallback_summary = self.tokenizer.decode(
-                        fallback_ids[0],
-                        skip_special_tokens=True,
-                        clean_up_tokenization_spaces=True
+                    # 使用简化参数重新解码（复用编码器输出）
+                    fallback_ids = self._generate_from_encoded(
+                        encoded_input,
+                        max_length=max_length,
+                        num_beams=1,  # 禁用束搜索，使用贪心解码
+                        early_stopping=True
                     )
 
+                    fallback_summary = self._decode(fallback_ids[:1])[0]
+
                     fallback_word_count = len(fallback_summary.split())
                     logger.debug(f"回退摘要词数: {fallback_word_count}")
 
@@ -240,26 +489,182 @@ class TextProcessor:
             logger.exception(f"摘要生成过程中发生错误: {str(error)}")
             raise RuntimeError(f"摘要生成失败: {str(error)}")
 
-    def process_file(self, file_path: str, language: str = "en", **summary_kwargs) -> str:
+    def generate_candidates(self,
+                            text: str,
+                            top_k: int = 3,
+                            max_length: int = 30,
+                            min_length: int = 10,
+                            language: str = "en",
+                            encoded_input: Optional[dict[str, torch.Tensor]] = None) -> list[tuple[str, float]]:
+        """
+        通过一次束搜索生成多个候选文件名，清理后去重并按得分排序
+
+        Args:
+            text: 待摘要的原始文本
+            top_k: 返回的候选数量上限
+            max_length: 摘要的最大长度（token数）
+            min_length: 摘要的最小长度（token数）
+            language: 文本语言代码
+            encoded_input: 可选，encode_input 的返回值；提供时直接复用，不再重新编码
+
+        Returns:
+            (清理后的文件名, 得分) 列表，按得分从高到低排序；得分为长度归一化的对数概率
+        """
+        candidates, _ = self._generate_candidates_with_summary(
+            text, top_k, max_length, min_length, language, encoded_input)
+        return candidates
+
+    def _generate_candidates_with_summary(self,
+                                          text: str,
+                                          top_k: int = 3,
+                                          max_length: int = 30,
+                                          min_length: int = 10,
+                                          language: str = "en",
+                                          encoded_input: Optional[dict[str, torch.Tensor]] = None
+                                          ) -> tuple[list[tuple[str, float]], Optional[str]]:
+        """
+        generate_candidates 的实现，同时返回首选候选对应的原始摘要
+
+        Returns:
+            (候选列表, 首选候选清理前的摘要)；没有有效候选时摘要为None
+        """
+        logger.info(f"开始生成候选文件名 (语言: {language}, 候选数: {top_k})")
+
+        try:
+            if encoded_input is None:
+                encoded_input = self.encode_input(text, language)
+            summary_prefix, _ = self._get_prefix_ids(language)
+
+            # 多返回一些序列，弥补清理后重复的候选
+            num_beams = max(4, top_k * 2)
+            generation_params = self._beam_generation_params(max_length, min_length, num_beams)
+            outputs = self._generate_from_encoded(
+                encoded_input,
+                num_return_sequences=num_beams,
+                return_dict_in_generate=True,
+                output_scores=True,
+                **generation_params
+            )
+
+            raw_summaries = self._decode(outputs.sequences)
+            scores = outputs.sequences_scores.tolist()
+
+            candidates = []
+            top_summary = None
+            seen_names = set()
+            for raw_summary, score in sorted(zip(raw_summaries, scores), key=lambda item: item[1], reverse=True):
+                if raw_summary.startswith(summary_prefix):
+                    raw_summary = raw_summary[len(summary_prefix):].strip()
+                candidate = self.clean_filename(raw_summary)
+
+                key = candidate.casefold()
+                if not candidate or key in seen_names:
+                    continue
+                seen_names.add(key)
+                if not candidates:
+                    top_summary = raw_summary
+                candidates.append((candidate, score))
+                if len(candidates) >= top_k:
+                    break
+
+            logger.info(f"候选文件名生成完成: {len(candidates)} 个")
+            return candidates, top_summary
+
+        except Exception as error:
+            logger.exception(f"候选文件名生成过程中发生错误: {str(error)}")
+            raise RuntimeError(f"候选文件名生成失败: {str(error)}")
+
+    def _read_budget(self, language: str) -> int:
+        """
+        读取文件时的字符预算：覆盖输入窗口及其一次扩展，并满足近似重复检测所需的文本长度
+
+        Args:
+            language: 文本语言代码
+
+        Returns:
+            最多读取的字符数
+        """
+        budget = self.input_char_budget(language) * 2
+        if self.near_duplicate_index is not None:
+            budget = max(budget, self.near_duplicate_index.MAX_TEXT_CHARS)
+        return budget
+
+    def _find_near_duplicate(self,
+                             text: str
+                             ) -> tuple[Optional[np.ndarray], Optional[list[tuple[str, float]]], Optional[str]]:
+        """
+        在近似重复索引中查找与文本近似的已处理文本
+
+        Args:
+            text: 文件文本
+
+        Returns:
+            (文本签名, 可复用的文件名候选列表, 可复用的原始摘要)；未启用索引或文本过短时签名为None，
+            未命中时候选和摘要为None（旧版索引条目没有保存摘要时以首选文件名代替）
+        """
+        if self.near_duplicate_index is None:
+            return None, None, None
+
+        signature = self.near_duplicate_index.signature(text)
+        if signature is None:
+            logger.debug("文本过短，跳过近似重复检测")
+            return None, None, None
+        match = self.near_duplicate_index.query(signature)
+        if match is None:
+            return signature, None, None
+
+        candidates, summary, similarity = match
+        logger.info(f"复用近似重复文本的文件名 (相似度: {similarity:.3f}): {candidates[0][0]}")
+
+        if self.near_duplicate_suffix:
+            suffix = hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()[:6]
+            candidates = [(f"{name} {suffix}", score) for name, score in candidates]
+        return signature, candidates, summary if summary is not None else candidates[0][0]
+
+    def read_content(self, file_path: str, language: str = "en") -> str:
+        """
+        按读取预算读取文件内容（可在其他线程中预读，再传给 process_file / process_file_candidates）
+
+        Args:
+            file_path: 要读取的文件路径
+            language: 文件内容的语言代码
+
+        Returns:
+            文件文本
+        """
+        logger.info(f"读取文件内容: {file_path}")
+        file_content = self.file_reader.read_file(file_path, max_chars=self._read_budget(language))
+        logger.info(f"文件读取成功 (内容长度: {len(file_content)} 字符)")
+        return file_content
+
+    def process_file(self,
+                     file_path: str,
+                     language: str = "en",
+                     file_content: Optional[str] = None,
+                     **summary_kwargs) -> tuple[str, str]:
         """
         完整的文件处理流程：读取文件内容并生成安全的文件名
 
         Args:
             file_path: 要处理的文件路径
             language: 文件内容的语言代码
+            file_content: 已预读的文件内容，为None时在此读取
             summary_kwargs: 传递给generate_summary的额外参数
 
         Returns:
-            清理后的摘要文本，可用作安全的文件名
+            (清理后的摘要文本，可用作安全的文件名, 清理前的原始摘要)
         """
         logger.info(f"开始处理文件: {file_path}")
         logger.debug(f"语言设置: {language}, 额外参数: {summary_kwargs}")
 
         try:
-            # 读取文件内容
-            logger.info(f"读取文件内容: {file_path}")
-            file_content = self.file_reader.read_file(file_path)
-            logger.info(f"文件读取成功 (内容长度: {len(file_content)} 字符)")
+            if file_content is None:
+                file_content = self.read_content(file_path, language)
+
+            # 近似重复文本直接复用已有文件名
+            signature, reused_candidates, reused_summary = self._find_near_duplicate(file_content)
+            if reused_candidates:
+                return reused_candidates[0][0], reused_summary
 
             # 生成摘要
             logger.info("开始生成摘要")
@@ -273,10 +678,74 @@ class TextProcessor:
             logger.info("清理摘要文本，确保文件名安全")
             safe_filename = self.clean_filename(raw_summary)
 
+            # 摘要清理后为空时不写入索引，避免近似文本复用空文件名
+            if signature is not None and safe_filename:
+                self.near_duplicate_index.add(signature, [(safe_filename, 0.0)], raw_summary)
+
             logger.info(f"文件处理完成: {file_path}")
             logger.info(f"生成安全文件名 (长度: {len(safe_filename)} 字符): {safe_filename[:50]}...")
 
-            return safe_filename
+            return safe_filename, raw_summary
+
+        except Exception as error:
+            logger.exception(f"文件处理失败: {file_path}, 错误: {str(error)}")
+            raise RuntimeError(f"文件处理失败: {str(error)}")
+
+    def process_file_candidates(self,
+                                file_path: str,
+                                top_k: int = 3,
+                                language: str = "en",
+                                file_content: Optional[str] = None,
+                                **summary_kwargs) -> tuple[list[tuple[str, float]], str]:
+        """
+        读取文件内容并通过一次模型推理生成多个候选文件名
+
+        Args:
+            file_path: 要处理的文件路径
+            top_k: 返回的候选数量上限
+            language: 文件内容的语言代码
+            file_content: 已预读的文件内容，为None时在此读取
+            summary_kwargs: 传递给generate_candidates的额外参数
+
+        Returns:
+            ((清理后的文件名, 得分) 列表，按得分从高到低排序, 首选文件名清理前的原始摘要)
+        """
+        logger.info(f"开始处理文件 (候选模式): {file_path}")
+
+        try:
+            if file_content is None:
+                file_content = self.read_content(file_path, language)
+
+            # 近似重复文本直接复用已有文件名
+            signature, reused_candidates, reused_summary = self._find_near_duplicate(file_content)
+            if reused_candidates:
+                return reused_candidates[:top_k], reused_summary
+
+            encoded_input = self.encode_input(file_content, language)
+            candidates, raw_summary = self._generate_candidates_with_summary(
+                text=file_content,
+                top_k=top_k,
+                language=language,
+                encoded_input=encoded_input,
+                **summary_kwargs
+            )
+
+            # 束搜索结果全部被清理为空时，回退到常规摘要流程（复用编码器输出）
+            if not candidates:
+                logger.warning("未得到有效候选，回退到单一摘要")
+                raw_summary = self.generate_summary(
+                    text=file_content,
+                    language=language,
+                    encoded_input=encoded_input,
+                    **summary_kwargs
+                )
+                candidates = [(self.clean_filename(raw_summary), 0.0)]
+
+            if signature is not None and candidates[0][0]:
+                self.near_duplicate_index.add(signature, candidates, raw_summary)
+
+            logger.info(f"文件处理完成: {file_path}, 候选: {[name for name, _ in candidates]}")
+            return candidates, raw_summary
 
         except Exception as error:
             logger.exception(f"文件处理失败: {file_path}, 错误: {str(error)}")
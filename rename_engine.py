@@ -0,0 +1,566 @@
+import argparse
+import ctypes
+import errno
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import nullcontext
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Union
+
+from filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RenameOperation:
+    """单个重命名操作"""
+    source: str  # 原文件路径
+    target: str  # 目标文件路径
+
+
+class RenameJournal:
+    """
+    仅追加的重命名日志（JSON Lines格式）
+    每次重命名前写入意图记录（intent），完成后写入提交记录（rename），失败时写入中止记录（abort），
+    撤销时写入 undo 记录；
+    崩溃时只有意图记录的操作根据文件系统的实际状态判断是否已完成，用于整批回滚
+    """
+
+    def __init__(self, journal_path: str, lock_path: Optional[str] = None):
+        """
+        初始化重命名日志
+
+        Args:
+            journal_path: 日志文件路径
+            lock_path: 可选的锁文件路径；多个进程或节点共享同一日志时用于串行化写入
+        """
+        self.journal_path = journal_path
+        self.lock_path = lock_path
+
+    def append(self, records: list[dict]) -> None:
+        """
+        追加日志记录并落盘
+
+        Args:
+            records: 日志记录列表
+        """
+        if not records:
+            return
+
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with FileLock(self.lock_path) if self.lock_path else nullcontext():
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self) -> list[dict]:
+        """读取全部日志记录，忽略损坏的行（如写入中途崩溃留下的残行）"""
+        if not os.path.exists(self.journal_path):
+            return []
+
+        records = []
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    logger.warning(f"重命名日志第 {line_number} 行损坏，已跳过")
+        return records
+
+
+class RenameEngine:
+    """
+    事务式重命名引擎
+    先在内存中规划一批重命名（确定性地解决名称冲突），再批量原子执行，
+    并将每个完成的操作写入日志，以便整批撤销
+    """
+    DEFAULT_JOURNAL_PATH = "log/rename_journal.jsonl"
+
+    # 冲突解决策略
+    COLLISION_NUMBER = "number"  # 追加序号，如 "摘要 (2).txt"
+    COLLISION_HASH = "hash"  # 追加内容哈希前缀，如 "摘要-1a2b3c4d.txt"
+
+    HASH_PREFIX_LENGTH = 8
+    MAX_APPLY_ATTEMPTS = 3  # 执行时遇到外部抢占的目标名称时的重试次数
+
+    def __init__(self,
+                 journal_path: str = DEFAULT_JOURNAL_PATH,
+                 collision_strategy: str = COLLISION_NUMBER,
+                 journal_lock_path: Optional[str] = None,
+                 directory_lock_dir: Optional[str] = None,
+                 root_dir: Optional[str] = None):
+        """
+        初始化重命名引擎
+
+        Args:
+            journal_path: 重命名日志路径
+            collision_strategy: 名称冲突解决策略（"number" 或 "hash"）
+            journal_lock_path: 可选的日志锁文件路径，多节点共享日志时使用
+            directory_lock_dir: 可选的目录锁存放目录；多节点重命名同一目录中的文件时，
+                                plan_and_apply 在锁内重新列出目录并规划、执行
+            root_dir: 可选的根目录；设置后日志和目录锁中的路径相对该目录保存，读取时再解析为本机路径，
+                      使共享目录挂载在不同路径的节点能识别彼此的重命名
+        """
+        if collision_strategy not in (self.COLLISION_NUMBER, self.COLLISION_HASH):
+            raise ValueError(f"不支持的冲突解决策略: {collision_strategy}")
+
+        self.journal = RenameJournal(journal_path, journal_lock_path)
+        self.collision_strategy = collision_strategy
+        self.directory_lock_dir = directory_lock_dir
+        self.root_dir = os.path.abspath(root_dir) if root_dir else None
+        self.batch_id: Optional[str] = None
+
+        # 每个目录中已占用的文件名（规范化后），首次访问目录时从磁盘加载
+        self._taken_names: dict[str, set[str]] = {}
+
+    def begin_batch(self) -> str:
+        """
+        开始一个新批次，之后执行的所有重命名都归入该批次
+
+        Returns:
+            批次ID
+        """
+        self.batch_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        self._taken_names.clear()
+        logger.info(f"开始重命名批次: {self.batch_id}")
+        return self.batch_id
+
+    # -------------------------- 规划 --------------------------
+    def plan(self, renames: list[tuple[str, Union[str, list[str]]]]) -> list[RenameOperation]:
+        """
+        在内存中规划一批重命名，为每个文件确定唯一的目标路径
+
+        Args:
+            renames: (原文件路径, 新文件名主干或按优先级排序的候选主干列表) 元组列表，
+                     新文件名不含后缀；首选名称冲突时依次尝试其余候选，
+                     全部冲突时再对首选名称应用冲突解决策略
+
+        Returns:
+            重命名操作列表（目标与原路径相同的文件不会出现在结果中）
+        """
+        operations = []
+        for source, new_stems in renames:
+            if isinstance(new_stems, str):
+                new_stems = [new_stems]
+            directory = os.path.dirname(source)
+            suffix = Path(source).suffix.lower()
+            taken = self._get_taken_names(directory)
+            source_name = os.path.normcase(os.path.basename(source))
+
+            # 任一候选与当前文件名一致时无需重命名
+            if any(os.path.normcase(new_stem + suffix) == source_name for new_stem in new_stems):
+                logger.debug(f"目标文件名与原文件名相同，跳过: {source}")
+                continue
+
+            target_name = next(
+                (new_stem + suffix for new_stem in new_stems if os.path.normcase(new_stem + suffix) not in taken),
+                None
+            )
+            if target_name is None:
+                target_name = self._resolve_collision(source, new_stems[0], suffix, taken)
+            taken.add(os.path.normcase(target_name))
+            operations.append(RenameOperation(source, os.path.join(directory, target_name)))
+
+        logger.info(f"重命名规划完成: {len(operations)} 个操作")
+        return operations
+
+    @staticmethod
+    def _directory_key(directory: str) -> str:
+        return os.path.normcase(os.path.abspath(directory or "."))
+
+    def _get_taken_names(self, directory: str) -> set[str]:
+        """获取目录中已占用的文件名集合"""
+        key = self._directory_key(directory)
+        if key not in self._taken_names:
+            try:
+                names = os.listdir(directory or ".")
+            except OSError as error:
+                logger.warning(f"无法列出目录 {directory}: {str(error)}")
+                names = []
+            self._taken_names[key] = {os.path.normcase(name) for name in names}
+        return self._taken_names[key]
+
+    def _resolve_collision(self, source: str, new_stem: str, suffix: str, taken: set[str]) -> str:
+        """
+        确定性地为目标文件名解决冲突
+
+        Args:
+            source: 原文件路径
+            new_stem: 新文件名主干
+            suffix: 文件后缀
+            taken: 目录中已占用的文件名集合
+
+        Returns:
+            不冲突的目标文件名
+        """
+        candidate = new_stem + suffix
+        if os.path.normcase(candidate) not in taken:
+            return candidate
+
+        if self.collision_strategy == self.COLLISION_HASH:
+            candidate = f"{new_stem}-{self._content_hash(source)}{suffix}"
+            if os.path.normcase(candidate) not in taken:
+                logger.info(f"文件名冲突，追加内容哈希: {candidate}")
+                return candidate
+
+        number = 2
+        while True:
+            candidate = f"{new_stem} ({number}){suffix}"
+            if os.path.normcase(candidate) not in taken:
+                logger.info(f"文件名冲突，追加序号: {candidate}")
+                return candidate
+            number += 1
+
+    def _content_hash(self, file_path: str) -> str:
+        """计算文件内容的短哈希"""
+        digest = hashlib.sha1()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()[:self.HASH_PREFIX_LENGTH]
+
+    # -------------------------- 执行 --------------------------
+    def plan_and_apply(self,
+                       renames: list[tuple[str, Union[str, list[str]]]]
+                       ) -> tuple[list[RenameOperation], list[Optional[Exception]]]:
+        """
+        按目录规划并执行重命名；设置了 directory_lock_dir 时，每个目录在共享锁内重新列出已占用的名称，
+        保证多个节点不会为同一目录中的文件选出相同的目标名称
+
+        Args:
+            renames: 同 plan() 的参数
+
+        Returns:
+            (重命名操作列表, 与操作一一对应的错误列表)
+        """
+        groups: dict[str, list[tuple[str, Union[str, list[str]]]]] = {}
+        for rename in renames:
+            groups.setdefault(self._directory_key(os.path.dirname(rename[0])), []).append(rename)
+
+        operations: list[RenameOperation] = []
+        errors: list[Optional[Exception]] = []
+        for directory_key, group in groups.items():
+            if self.directory_lock_dir:
+                os.makedirs(self.directory_lock_dir, exist_ok=True)
+                # 锁名取自相对根目录的路径，不同挂载路径的节点对同一目录使用同一把锁
+                lock_key = os.path.normcase(self._journal_path_of(directory_key))
+                lock_name = hashlib.sha1(lock_key.encode("utf-8")).hexdigest()[:16] + ".lock"
+                lock = FileLock(os.path.join(self.directory_lock_dir, lock_name))
+            else:
+                lock = nullcontext()
+            with lock:
+                if self.directory_lock_dir:
+                    # 其他节点可能已在该目录中重命名过文件，缓存的名称集合不再可信
+                    self._taken_names.pop(directory_key, None)
+                group_operations = self.plan(group)
+                operations.extend(group_operations)
+                errors.extend(self.apply(group_operations))
+        return operations, errors
+
+    def apply(self, operations: list[RenameOperation]) -> list[Optional[Exception]]:
+        """
+        批量执行重命名操作；每个操作执行前后分别写入并落盘意图和提交记录，中途崩溃也能撤销已完成的部分
+
+        Args:
+            operations: plan() 返回的重命名操作列表（执行时可能因冲突被改写目标路径）
+
+        Returns:
+            与操作一一对应的错误列表，成功的操作对应 None
+        """
+        if self.batch_id is None:
+            self.begin_batch()
+
+        errors: list[Optional[Exception]] = []
+        for operation in operations:
+            try:
+                self._apply_operation(operation)
+                self.journal.append([self._journal_record("rename", operation.source, operation.target)])
+                errors.append(None)
+                logger.debug(f"文件重命名完成: {operation.source} -> {operation.target}")
+            except Exception as error:
+                logger.error(f"重命名失败: {operation.source} -> {operation.target}, 错误: {str(error)}")
+                errors.append(error)
+
+        success_count = sum(error is None for error in errors)
+        logger.info(f"批量重命名完成: 成功 {success_count} 个, 失败 {len(operations) - success_count} 个")
+        return errors
+
+    def _journal_record(self, op: str, source: str, target: str, batch_id: Optional[str] = None) -> dict:
+        """构建一条日志记录"""
+        return {
+            "batch": batch_id or self.batch_id,
+            "op": op,
+            "source": self._journal_path_of(source),
+            "target": self._journal_path_of(target),
+            "time": time.time()
+        }
+
+    def _journal_path_of(self, path: str) -> str:
+        """将本机路径转换为日志中保存的路径（设置了根目录时为相对路径）"""
+        if not self.root_dir:
+            return path
+        try:
+            return os.path.relpath(os.path.abspath(path), self.root_dir)
+        except ValueError:
+            return path  # Windows下与根目录不在同一驱动器
+
+    def _local_path(self, path: str) -> str:
+        """将日志中保存的路径解析为本机路径（旧版日志中的绝对路径保持不变）"""
+        if not self.root_dir or os.path.isabs(path):
+            return path
+        return os.path.normpath(os.path.join(self.root_dir, path))
+
+    def _read_records(self) -> list[dict]:
+        """读取日志，并将记录中的路径解析为本机路径"""
+        records = self.journal.read()
+        for record in records:
+            for field in ("source", "target"):
+                if isinstance(record.get(field), str):
+                    record[field] = self._local_path(record[field])
+        return records
+
+    def _apply_operation(self, operation: RenameOperation) -> None:
+        """执行单个重命名，目标被外部进程抢占时重新选择名称"""
+        for attempt in range(self.MAX_APPLY_ATTEMPTS):
+            self.journal.append([self._journal_record("intent", operation.source, operation.target)])
+            try:
+                rename_no_replace(operation.source, operation.target)
+                return
+            except Exception as error:
+                # 关闭本次尝试的意图记录，否则日后改名成功时，被他人占用的原目标会被误判为本批次的重命名
+                self.journal.append([self._journal_record("abort", operation.source, operation.target)])
+                if not isinstance(error, FileExistsError) or attempt == self.MAX_APPLY_ATTEMPTS - 1:
+                    raise
+            directory = os.path.dirname(operation.target)
+            target_path = Path(operation.target)
+            taken = self._get_taken_names(directory)
+            taken.add(os.path.normcase(target_path.name))
+            target_name = self._resolve_collision(operation.source, target_path.stem, target_path.suffix, taken)
+            taken.add(os.path.normcase(target_name))
+            operation.target = os.path.join(directory, target_name)
+            logger.warning(f"目标文件已被占用，改用: {operation.target}")
+
+    @staticmethod
+    def _completed_records(records: list[dict]) -> list[dict]:
+        """
+        将日志中的意图记录解析为已完成的重命名：有提交记录的直接采用；
+        只有意图记录（执行期间崩溃）的，目标存在且原文件已不存在时视为已完成。
+        已中止（abort）的意图，以及同一批次中同一原文件被后续尝试取代的意图，均不予解析
+
+        Args:
+            records: 日志中的全部记录
+
+        Returns:
+            按日志顺序排列的 rename 与 undo 记录
+        """
+        committed = {
+            (record.get("batch"), record.get("source"), record.get("target"))
+            for record in records if record.get("op") == "rename"
+        }
+        aborted = {
+            (record.get("batch"), record.get("source"), record.get("target"))
+            for record in records if record.get("op") == "abort"
+        }
+        # 每个 (批次, 原文件) 只有最后一次尝试可能停在意图阶段
+        last_intents = {
+            (record.get("batch"), record.get("source")): position
+            for position, record in enumerate(records) if record.get("op") == "intent"
+        }
+        resolved = []
+        for position, record in enumerate(records):
+            op = record.get("op")
+            if op == "intent":
+                key = (record.get("batch"), record.get("source"), record.get("target"))
+                if last_intents[key[:2]] != position or key in aborted:
+                    continue
+                if (key not in committed and os.path.lexists(record["target"])
+                        and not os.path.lexists(record["source"])):
+                    committed.add(key)
+                    resolved.append(dict(record, op="rename"))
+            elif op in ("rename", "undo"):
+                resolved.append(record)
+        return resolved
+
+    def renamed_sources(self) -> dict[str, str]:
+        """
+        从日志中汇总已完成且未撤销的重命名
+
+        Returns:
+            原文件路径 -> 目标文件路径
+        """
+        renamed = {}
+        for record in self._completed_records(self._read_records()):
+            if record.get("op") == "rename":
+                renamed[record["source"]] = record["target"]
+            elif record.get("op") == "undo" and renamed.get(record.get("source")) == record.get("target"):
+                del renamed[record["source"]]
+        return renamed
+
+    # -------------------------- 撤销 --------------------------
+    def list_batches(self) -> list[str]:
+        """按时间顺序列出日志中尚未撤销的批次ID"""
+        batches = []
+        undone = set()
+        for record in self._completed_records(self._read_records()):
+            if record.get("op") == "undo":
+                undone.add(record.get("batch"))
+            elif record.get("batch") not in batches:
+                batches.append(record.get("batch"))
+        return [batch_id for batch_id in batches if batch_id not in undone]
+
+    def undo_batch(self, batch_id: str) -> tuple[int, int]:
+        """
+        撤销整个批次的重命名（按执行的逆序）
+
+        Args:
+            batch_id: 批次ID
+
+        Returns:
+            (成功撤销数, 失败数)
+        """
+        logger.info(f"开始撤销重命名批次: {batch_id}")
+        records = self._completed_records(self._read_records())
+
+        reverted = {
+            (record["source"], record["target"])
+            for record in records
+            if record.get("batch") == batch_id and record.get("op") == "undo"
+        }
+        operations = [
+            record for record in records
+            if record.get("batch") == batch_id and record.get("op") == "rename"
+            and (record["source"], record["target"]) not in reverted
+        ]
+
+        reverted_count = 0
+        failed_count = 0
+        for record in reversed(operations):
+            try:
+                rename_no_replace(record["target"], record["source"])
+                self.journal.append([self._journal_record("undo", record["source"], record["target"], batch_id)])
+                reverted_count += 1
+            except Exception as error:
+                failed_count += 1
+                logger.error(f"撤销失败: {record['target']} -> {record['source']}, 错误: {str(error)}")
+
+        self._taken_names.clear()
+        logger.info(f"批次 {batch_id} 撤销完成: 成功 {reverted_count} 个, 失败 {failed_count} 个")
+        return reverted_count, failed_count
+
+
+_RENAME_NOREPLACE = 1  # Linux renameat2 标志
+_RENAME_EXCL = 0x4  # macOS renamex_np 标志
+_AT_FDCWD = -100
+_libc = None
+
+
+def _native_rename_no_replace(source: str, target: str) -> bool:
+    """
+    使用系统原生的不覆盖重命名（Linux renameat2 / macOS renamex_np）
+
+    Returns:
+        是否已完成重命名；系统或文件系统不支持时返回False
+    """
+    global _libc
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(None, use_errno=True)
+        except OSError:
+            _libc = False
+    if not _libc:
+        return False
+
+    if hasattr(_libc, "renameat2"):
+        result = _libc.renameat2(_AT_FDCWD, os.fsencode(source), _AT_FDCWD, os.fsencode(target), _RENAME_NOREPLACE)
+    elif hasattr(_libc, "renamex_np"):
+        result = _libc.renamex_np(os.fsencode(source), os.fsencode(target), _RENAME_EXCL)
+    else:
+        return False
+    if result == 0:
+        return True
+
+    error_code = ctypes.get_errno()
+    if error_code == errno.EEXIST:
+        raise FileExistsError(errno.EEXIST, "目标文件已存在", target)
+    if error_code in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP):
+        return False
+    raise OSError(error_code, os.strerror(error_code), source, None, target)
+
+
+def rename_no_replace(source: str, target: str) -> None:
+    """
+    原子地重命名文件，目标已存在时抛出 FileExistsError 而不是覆盖
+    依次尝试原生不覆盖重命名、硬链接+删除、以 O_CREAT|O_EXCL 预占目标后重命名，不会退化为无保护的覆盖
+
+    Args:
+        source: 原文件路径
+        target: 目标文件路径
+    """
+    if os.name == "nt":
+        # Windows下目标存在时 os.rename 本身即原子地失败
+        os.rename(source, target)
+        return
+
+    if _native_rename_no_replace(source, target):
+        return
+
+    # POSIX下 os.rename 会静默覆盖目标，改用硬链接+删除实现不覆盖的原子重命名
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        raise
+    except OSError as error:
+        if error.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK, errno.EXDEV):
+            raise
+    else:
+        os.unlink(source)
+        return
+
+    # 文件系统不支持硬链接（如FAT、SMB/CIFS挂载）：先独占创建目标文件占位，
+    # 其他进程此时无法再取得该名称，再把原文件重命名到自己的占位文件上
+    fd = os.open(target, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    os.close(fd)
+    try:
+        os.rename(source, target)
+    except OSError:
+        os.unlink(target)
+        raise
+
+
+if __name__ == "__main__":
+    """命令行入口：列出或撤销重命名批次"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Summly 重命名日志工具")
+    parser.add_argument("--journal", default=RenameEngine.DEFAULT_JOURNAL_PATH, help="重命名日志路径")
+    parser.add_argument("--root-dir", help="日志中相对路径所基于的根目录（分布式处理时为共享目录）")
+    parser.add_argument("--list", action="store_true", help="列出可撤销的批次")
+    parser.add_argument("--undo", metavar="BATCH_ID", nargs="?", const="last", help="撤销指定批次（默认最近一次）")
+    args = parser.parse_args()
+
+    engine = RenameEngine(journal_path=args.journal, root_dir=args.root_dir)
+    batch_ids = engine.list_batches()
+
+    if args.undo:
+        if not batch_ids:
+            parser.exit(1, "没有可撤销的批次\n")
+        batch_id = batch_ids[-1] if args.undo == "last" else args.undo
+        reverted_count, failed_count = engine.undo_batch(batch_id)
+        print(f"批次 {batch_id}: 已撤销 {reverted_count} 个, 失败 {failed_count} 个")
+    else:
+        for batch_id in batch_ids:
+            print(batch_id)
@@ -0,0 +1,223 @@
+import ctypes
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def _cpu_count() -> int:
+    """当前进程可用的CPU核心数（考虑CPU亲和性限制）"""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def _available_memory() -> Optional[int]:
+    """系统可用内存（字节），无法获取时返回None"""
+    try:
+        import psutil
+        return psutil.virtual_memory().available
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong),
+                ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong),
+                ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong),
+                ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong),
+                ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys
+        return None
+
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def process_rss() -> Optional[int]:
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+
+    if sys.platform == "win32":
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [
+                ("cb", ctypes.c_ulong),
+                ("PageFaultCount", ctypes.c_ulong),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(ProcessMemoryCounters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+class ResourceGovernor:
+    """
+    自适应资源调节器
+    启动时根据CPU核心数和可用内存确定torch线程数、读取线程数、批大小和内存预算；
+    运行中根据每个文件的处理延迟和进程常驻内存动态调整批大小（预读深度），
+    内存超出预算时回收、缩小批大小并暂停预读（背压），代替固定间隔的强制垃圾回收
+    """
+    MEMORY_BUDGET_FRACTION = 0.7  # 内存预算占启动时（进程内存+系统可用内存）的比例
+    MIN_BATCH_SIZE = 1
+    MAX_BATCH_SIZE = 32
+    LATENCY_SMOOTHING = 0.2  # 延迟滑动平均系数
+    LATENCY_TOLERANCE = 1.5  # 延迟超过基线的倍数时缩小批大小
+    BASELINE_DECAY = 0.05  # 基线向当前平均延迟回升的系数，使偶然的低延迟不会永久压低基线
+    COLLECT_INTERVAL = 1.0  # 内存超预算时两次垃圾回收的最小间隔（秒）
+
+    _torch_configured = False
+    _torch_lock = threading.Lock()
+
+    def __init__(self, memory_budget: Optional[int] = None):
+        """
+        探测系统资源并确定初始配置
+
+        Args:
+            memory_budget: 进程内存预算（字节），默认根据可用内存自动确定
+        """
+        self.cpu_count = _cpu_count()
+        rss = process_rss() or 0
+        available = _available_memory()
+
+        if memory_budget is not None:
+            self.memory_budget = memory_budget
+        elif available is not None:
+            self.memory_budget = int((rss + available) * self.MEMORY_BUDGET_FRACTION)
+        else:
+            self.memory_budget = None
+
+        # 计算线程占用大部分核心，读取线程负责I/O预读
+        self.worker_count = max(1, min(4, self.cpu_count // 4))
+        self.intra_op_threads = max(1, self.cpu_count - self.worker_count)
+        self.inter_op_threads = 1 if self.cpu_count <= 4 else 2
+
+        # 内存越紧张，初始批越小
+        if self.memory_budget is None or available is None:
+            self.batch_size = 4
+        else:
+            headroom_gb = max(0, self.memory_budget - rss) / 1024 ** 3
+            self.batch_size = int(min(self.MAX_BATCH_SIZE, max(self.MIN_BATCH_SIZE, headroom_gb * 4)))
+
+        self._latency_baseline: Optional[float] = None
+        self._latency_average: Optional[float] = None
+        self._last_collect_time = 0.0
+
+        budget_text = f"{self.memory_budget / 1024 ** 2:.0f} MB" if self.memory_budget else "未知"
+        logger.info(f"资源调节器: CPU {self.cpu_count} 核, 内存预算 {budget_text}, "
+                    f"计算线程 {self.intra_op_threads}/{self.inter_op_threads}, "
+                    f"读取线程 {self.worker_count}, 初始批大小 {self.batch_size}")
+
+    def configure_torch(self) -> None:
+        """设置torch线程数（进程内只生效一次，须在模型推理开始前调用）"""
+        with self._torch_lock:
+            if ResourceGovernor._torch_configured:
+                return
+            torch.set_num_threads(self.intra_op_threads)
+            try:
+                torch.set_num_interop_threads(self.inter_op_threads)
+            except RuntimeError as error:
+                # 已经有并行任务运行过时无法再修改inter-op线程数
+                logger.warning(f"无法设置inter-op线程数: {str(error)}")
+            ResourceGovernor._torch_configured = True
+        logger.info(f"torch线程数: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+    def over_budget(self) -> bool:
+        """进程内存是否超出预算"""
+        if self.memory_budget is None:
+            return False
+        rss = process_rss()
+        return rss is not None and rss > self.memory_budget
+
+    def record(self, latency: float) -> None:
+        """
+        记录一个文件的处理延迟并调整批大小：
+        延迟明显高于基线时减一，延迟正常且内存未超预算时加一。
+        基线跟随平均延迟的低点，并缓慢回升到当前水平（文件长度分布变化后重新锚定）；
+        调用方只应记录实际运行了模型的文件
+
+        Args:
+            latency: 单个文件的处理耗时（秒）
+        """
+        if self._latency_average is None:
+            self._latency_average = latency
+        else:
+            self._latency_average += self.LATENCY_SMOOTHING * (latency - self._latency_average)
+        if self._latency_baseline is None or self._latency_average < self._latency_baseline:
+            self._latency_baseline = self._latency_average
+        else:
+            self._latency_baseline += self.BASELINE_DECAY * (self._latency_average - self._latency_baseline)
+
+        previous_batch_size = self.batch_size
+        if self._latency_average > self._latency_baseline * self.LATENCY_TOLERANCE:
+            self.batch_size = max(self.MIN_BATCH_SIZE, self.batch_size - 1)
+        elif not self.over_budget():
+            self.batch_size = min(self.MAX_BATCH_SIZE, self.batch_size + 1)
+
+        if self.batch_size != previous_batch_size:
+            logger.debug(f"批大小调整: {previous_batch_size} -> {self.batch_size} "
+                         f"(平均延迟 {self._latency_average:.2f} 秒)")
+
+    def admit(self) -> bool:
+        """
+        判断是否允许继续预读：内存超出预算时执行垃圾回收（限制频率）并将批大小减半，
+        回收后仍超出预算则拒绝，由调用方暂停预读，只处理已读入的文件
+
+        Returns:
+            是否允许再预读一个文件
+        """
+        if not self.over_budget():
+            return True
+
+        now = time.monotonic()
+        if now - self._last_collect_time < self.COLLECT_INTERVAL:
+            return False
+        self._last_collect_time = now
+
+        self.batch_size = max(self.MIN_BATCH_SIZE, self.batch_size // 2)
+        logger.info(f"内存超出预算，触发垃圾回收并将批大小降为 {self.batch_size}")
+        gc.collect()
+        return not self.over_budget()
@@ -0,0 +1,339 @@
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 二元组索引按连续的文字（字母、数字、中日韩文字等）切分，标点和空白作为分隔
+_WORD_RUN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def bigram_text(text: Optional[str]) -> str:
+    """
+    将文本转换为以空格分隔的二元组序列，供二元组索引分词
+    每段连续文字产出其所有相邻二元组，以及末尾的单字，使任意一两个字的查询词都能命中索引
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        二元组序列文本
+    """
+    tokens = []
+    for run in _WORD_RUN_PATTERN.findall(text or ""):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        tokens.append(run[-1])
+    return " ".join(tokens)
+
+
+@dataclass
+class SummaryRecord:
+    """一个已处理文件的索引记录"""
+    original_path: str
+    new_path: str
+    summary: str
+    language: str
+    content_hash: str
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+
+class SummaryIndex:
+    """
+    已处理文件的摘要索引（SQLite + FTS5）
+    保存原始路径、新文件名、摘要、语言、内容哈希和时间戳，支持毫秒级全文检索；
+    同时记录重命名后文件的大小和修改时间，再次处理时无需读取内容即可跳过已处理的文件
+    """
+    DEFAULT_DB_PATH = "cache/summary_index.db"
+    MIN_TRIGRAM_LENGTH = 3  # trigram分词下可走索引的最短查询词，更短的词使用二元组索引
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            id INTEGER PRIMARY KEY,
+            original_path TEXT NOT NULL,
+            new_path TEXT NOT NULL UNIQUE,
+            summary TEXT NOT NULL,
+            language TEXT NOT NULL,
+            content_hash TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            file_mtime_ns INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+            INSERT INTO documents_fts(rowid, summary, original_path, new_path)
+            VALUES (new.id, new.summary, new.original_path, new.new_path);
+        END;
+        CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, summary, original_path, new_path)
+            VALUES ('delete', old.id, old.summary, old.original_path, old.new_path);
+        END;
+        CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+            INSERT INTO documents_fts(documents_fts, rowid, summary, original_path, new_path)
+            VALUES ('delete', old.id, old.summary, old.original_path, old.new_path);
+            INSERT INTO documents_fts(rowid, summary, original_path, new_path)
+            VALUES (new.id, new.summary, new.original_path, new.new_path);
+        END;
+    """
+
+    # 二元组索引（不保存原文），由触发器通过 summly_bigrams 函数与 documents 表同步
+    _BIGRAM_SCHEMA = """
+        CREATE TRIGGER IF NOT EXISTS documents_bigram_ai AFTER INSERT ON documents BEGIN
+            INSERT INTO documents_bigram(rowid, summary, original_path, new_path)
+            VALUES (new.id, summly_bigrams(new.summary), summly_bigrams(new.original_path),
+                    summly_bigrams(new.new_path));
+        END;
+        CREATE TRIGGER IF NOT EXISTS documents_bigram_ad AFTER DELETE ON documents BEGIN
+            INSERT INTO documents_bigram(documents_bigram, rowid, summary, original_path, new_path)
+            VALUES ('delete', old.id, summly_bigrams(old.summary), summly_bigrams(old.original_path),
+                    summly_bigrams(old.new_path));
+        END;
+        CREATE TRIGGER IF NOT EXISTS documents_bigram_au AFTER UPDATE ON documents BEGIN
+            INSERT INTO documents_bigram(documents_bigram, rowid, summary, original_path, new_path)
+            VALUES ('delete', old.id, summly_bigrams(old.summary), summly_bigrams(old.original_path),
+                    summly_bigrams(old.new_path));
+            INSERT INTO documents_bigram(rowid, summary, original_path, new_path)
+            VALUES (new.id, summly_bigrams(new.summary), summly_bigrams(new.original_path),
+                    summly_bigrams(new.new_path));
+        END;
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        """
+        打开（必要时创建）摘要索引
+
+        Args:
+            db_path: SQLite数据库路径
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        try:
+            self._connection = sqlite3.connect(db_path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.create_function("summly_bigrams", 1, bigram_text, deterministic=True)
+            self.trigram = self._create_fts_table()
+            self._connection.executescript(self._SCHEMA)
+            # trigram无法索引一两个字的查询词（如“合同”），为其另建二元组索引
+            if self.trigram:
+                self._create_bigram_table()
+                self._connection.executescript(self._BIGRAM_SCHEMA)
+            self._connection.commit()
+        except sqlite3.Error as error:
+            logger.exception(f"打开摘要索引失败: {db_path}")
+            raise RuntimeError(f"打开摘要索引失败: {str(error)}")
+
+    def _create_fts_table(self) -> bool:
+        """
+        创建全文索引表：优先使用trigram分词（支持中日韩等无空格文本的子串检索），
+        SQLite版本不支持时回退到unicode61分词
+
+        Returns:
+            是否使用trigram分词
+        """
+        row = self._connection.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'documents_fts'"
+        ).fetchone()
+        if row is not None:
+            return "trigram" in row[0]
+
+        columns = "summary, original_path, new_path, content='documents', content_rowid='id'"
+        try:
+            self._connection.execute(f"CREATE VIRTUAL TABLE documents_fts USING fts5({columns}, tokenize='trigram')")
+            return True
+        except sqlite3.OperationalError:
+            logger.warning("SQLite不支持trigram分词，回退到unicode61分词")
+            self._connection.execute(f"CREATE VIRTUAL TABLE documents_fts USING fts5({columns})")
+            return False
+
+    def _create_bigram_table(self) -> None:
+        """创建二元组索引表；已有数据库首次创建时为已有记录补建索引"""
+        row = self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents_bigram'"
+        ).fetchone()
+        if row is not None:
+            return
+
+        self._connection.execute("""
+            CREATE VIRTUAL TABLE documents_bigram USING fts5(
+                summary, original_path, new_path, content='', prefix='1',
+                tokenize='unicode61 remove_diacritics 0'
+            )
+        """)
+        self._connection.execute("""
+            INSERT INTO documents_bigram(rowid, summary, original_path, new_path)
+            SELECT id, summly_bigrams(summary), summly_bigrams(original_path), summly_bigrams(new_path)
+            FROM documents
+        """)
+        logger.info("已创建摘要的二元组索引")
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # -------------------------- 写入 --------------------------
+    def record_many(self, records: list[SummaryRecord]) -> None:
+        """
+        在一个事务中写入一批处理结果；同一新路径的已有记录会被更新（保留首次创建时间）
+
+        Args:
+            records: 处理结果列表，new_path 必须是重命名后实际存在的文件
+        """
+        rows = []
+        now = time.time()
+        for record in records:
+            try:
+                stat = os.stat(record.new_path)
+            except OSError as error:
+                logger.warning(f"无法读取文件信息，不写入摘要索引: {record.new_path}, 错误: {str(error)}")
+                continue
+            rows.append((record.original_path, os.path.abspath(record.new_path), record.summary, record.language,
+                         record.content_hash, stat.st_size, stat.st_mtime_ns, now, now))
+
+        if not rows:
+            return
+
+        with self._connection:
+            self._connection.executemany("""
+                INSERT INTO documents (original_path, new_path, summary, language, content_hash,
+                                       file_size, file_mtime_ns, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(new_path) DO UPDATE SET
+                    original_path = excluded.original_path,
+                    summary = excluded.summary,
+                    language = excluded.language,
+                    content_hash = excluded.content_hash,
+                    file_size = excluded.file_size,
+                    file_mtime_ns = excluded.file_mtime_ns,
+                    updated_at = excluded.updated_at
+            """, rows)
+        logger.info(f"摘要索引写入 {len(rows)} 条记录")
+
+    def move(self, old_path: str, new_path: str) -> None:
+        """
+        文件再次重命名后更新记录中的路径
+
+        Args:
+            old_path: 原路径
+            new_path: 新路径
+        """
+        with self._connection:
+            self._connection.execute(
+                "UPDATE documents SET new_path = ?, updated_at = ? WHERE new_path = ?",
+                (os.path.abspath(new_path), time.time(), os.path.abspath(old_path))
+            )
+
+    # -------------------------- 查询 --------------------------
+    def find_processed(self, file_path: str) -> Optional[SummaryRecord]:
+        """
+        判断文件是否已处理过：路径、大小和修改时间均与索引记录一致时视为已处理（不读取文件内容）
+
+        Args:
+            file_path: 文件路径
+
+        Returns:
+            已处理时返回对应记录，否则返回None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        row = self._connection.execute("""
+            SELECT original_path, new_path, summary, language, content_hash, created_at, updated_at
+            FROM documents WHERE new_path = ? AND file_size = ? AND file_mtime_ns = ?
+        """, (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)).fetchone()
+        return SummaryRecord(*row) if row is not None else None
+
+    def search(self, query: str, limit: int = 50) -> list[SummaryRecord]:
+        """
+        在摘要、原始路径和新路径中全文检索
+
+        Args:
+            query: 检索词，多个词以空格分隔，需全部命中
+            limit: 返回结果数上限
+
+        Returns:
+            按写入顺序从新到旧排列的记录列表
+            （不按相关度排序：常见词可能命中全部记录，逐条打分无法在毫秒内完成）
+        """
+        terms = query.split()
+        if not terms:
+            return []
+
+        columns = "d.original_path, d.new_path, d.summary, d.language, d.content_hash, d.created_at, d.updated_at"
+        long_terms = [term for term in terms if not self.trigram or len(term) >= self.MIN_TRIGRAM_LENGTH]
+        short_terms = [term for term in terms if self.trigram and len(term) < self.MIN_TRIGRAM_LENGTH]
+
+        if all(_WORD_RUN_PATTERN.fullmatch(term) for term in short_terms):
+            # 每个词作为短语加引号，避免用户输入被解析为FTS5查询语法；
+            # 短词在二元组索引中检索：两个字按二元组精确匹配，单字按前缀匹配（覆盖以该字开头的二元组和末尾单字，
+            # 由单字前缀索引支持）
+            subqueries = []
+            parameters = []
+            if long_terms:
+                subqueries.append("SELECT rowid FROM documents_fts WHERE documents_fts MATCH ?")
+                parameters.append(" ".join('"' + term.replace('"', '""') + '"' for term in long_terms))
+            if short_terms:
+                subqueries.append("SELECT rowid FROM documents_bigram WHERE documents_bigram MATCH ?")
+                parameters.append(" ".join(f'"{term}"' + ("*" if len(term) == 1 else "") for term in short_terms))
+            # 两个索引的结果取交集（用 rowid IN 关联会对每个候选重复执行全文匹配）
+            sql = f"""
+                SELECT {columns} FROM documents d JOIN (
+                    {" INTERSECT ".join(subqueries)} ORDER BY 1 DESC LIMIT ?
+                ) f ON d.id = f.rowid ORDER BY d.id DESC
+            """
+            parameters.append(limit)
+        else:
+            # 含标点的短词无法由二元组索引覆盖，退化为子串扫描
+            conditions = " AND ".join(
+                "(d.summary LIKE ? ESCAPE '\\' OR d.original_path LIKE ? ESCAPE '\\' OR d.new_path LIKE ? ESCAPE '\\')"
+                for _ in terms
+            )
+            sql = f"SELECT {columns} FROM documents d WHERE {conditions} ORDER BY d.id DESC LIMIT ?"
+            parameters = []
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                parameters.extend([pattern] * 3)
+            parameters.append(limit)
+
+        start_time = time.perf_counter()
+        try:
+            rows = self._connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as error:
+            logger.exception(f"摘要检索失败: {query}")
+            raise RuntimeError(f"摘要检索失败: {str(error)}")
+        logger.info(f"摘要检索 \"{query}\": {len(rows)} 条结果 (耗时 {(time.perf_counter() - start_time) * 1000:.1f} ms)")
+        return [SummaryRecord(*row) for row in rows]
+
+
+if __name__ == "__main__":
+    """命令行入口：检索已处理文件的摘要索引"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    parser = argparse.ArgumentParser(description="Summly 摘要索引检索")
+    parser.add_argument("query", help="检索词，多个词以空格分隔")
+    parser.add_argument("--db", default=SummaryIndex.DEFAULT_DB_PATH, help="摘要索引数据库路径")
+    parser.add_argument("--limit", type=int, default=50, help="返回结果数上限")
+    args = parser.parse_args()
+
+    summary_index = SummaryIndex(args.db)
+    for result in summary_index.search(args.query, args.limit):
+        updated = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(result.updated_at))
+        print(f"{updated}  {result.new_path}\n    原始路径: {result.original_path}\n    摘要: {result.summary}")
+    summary_index.close()
@@ -0,0 +1,161 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rename_engine import RenameEngine, rename_no_replace  # noqa: E402
+
+
+class RenameEngineTestCase(unittest.TestCase):
+    """重命名引擎的规划、执行与撤销测试"""
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.files_dir = os.path.join(self.work_dir, "files")
+        os.makedirs(self.files_dir)
+        self.journal_path = os.path.join(self.work_dir, "journal.jsonl")
+        self.engine = RenameEngine(journal_path=self.journal_path)
+        self.engine.begin_batch()
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.files_dir, name)
+
+    def _write(self, name: str, content: str) -> str:
+        path = self._path(name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def _read(self, name: str) -> str:
+        with open(self._path(name), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def _journal_ops(self) -> list[str]:
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            return [json.loads(line)["op"] for line in f]
+
+    # -------------------------- 规划 --------------------------
+    def test_plan_numbers_collisions_with_existing_and_planned_names(self):
+        self._write("报告.txt", "existing")
+        sources = [self._write(f"{name}.txt", name) for name in ("a", "b")]
+
+        operations = self.engine.plan([(source, "报告") for source in sources])
+
+        self.assertEqual([os.path.basename(op.target) for op in operations], ["报告 (2).txt", "报告 (3).txt"])
+
+    def test_plan_prefers_next_free_candidate(self):
+        self._write("first.txt", "existing")
+        source = self._write("a.txt", "a")
+
+        operations = self.engine.plan([(source, ["first", "second"])])
+
+        self.assertEqual(os.path.basename(operations[0].target), "second.txt")
+
+    def test_plan_skips_file_that_already_has_the_name(self):
+        source = self._write("same.txt", "a")
+
+        self.assertEqual(self.engine.plan([(source, "same")]), [])
+
+    def test_plan_hash_strategy_appends_content_hash(self):
+        engine = RenameEngine(journal_path=self.journal_path, collision_strategy=RenameEngine.COLLISION_HASH)
+        self._write("name.txt", "existing")
+        source = self._write("a.txt", "a")
+
+        target = os.path.basename(engine.plan([(source, "name")])[0].target)
+
+        self.assertRegex(target, r"^name-[0-9a-f]{8}\.txt$")
+
+    # -------------------------- 执行与撤销 --------------------------
+    def test_apply_and_undo_round_trip(self):
+        source = self._write("a.txt", "A")
+        operations = self.engine.plan([(source, "摘要")])
+
+        self.assertEqual(self.engine.apply(operations), [None])
+        self.assertEqual(self._read("摘要.txt"), "A")
+        self.assertEqual(self._journal_ops(), ["intent", "rename"])
+        self.assertEqual(self.engine.renamed_sources(), {source: self._path("摘要.txt")})
+
+        self.assertEqual(self.engine.undo_batch(self.engine.batch_id), (1, 0))
+        self.assertEqual(self._read("a.txt"), "A")
+        self.assertFalse(os.path.exists(self._path("摘要.txt")))
+        self.assertEqual(self.engine.renamed_sources(), {})
+        self.assertEqual(self.engine.list_batches(), [])
+
+    def test_rename_no_replace_refuses_existing_target(self):
+        source = self._write("a.txt", "A")
+        self._write("b.txt", "B")
+
+        with self.assertRaises(FileExistsError):
+            rename_no_replace(source, self._path("b.txt"))
+        self.assertEqual(self._read("b.txt"), "B")
+
+    def test_target_taken_after_planning_is_retried_and_aborted_intent_is_ignored(self):
+        source = self._write("a.txt", "A")
+        operations = self.engine.plan([(source, "X")])
+        self._write("X.txt", "FOREIGN")  # 其他进程在规划之后抢占了目标名称
+
+        self.assertEqual(self.engine.apply(operations), [None])
+        self.assertEqual(os.path.basename(operations[0].target), "X (2).txt")
+        self.assertEqual(self._journal_ops(), ["intent", "abort", "intent", "rename"])
+
+        # 用户随后移走了重命名后的文件：撤销应当失败，而不是把他人的 X.txt 搬回 a.txt
+        shutil.move(self._path("X (2).txt"), os.path.join(self.work_dir, "moved.txt"))
+        self.assertEqual(self.engine.undo_batch(self.engine.batch_id), (0, 1))
+        self.assertEqual(self._read("X.txt"), "FOREIGN")
+        self.assertFalse(os.path.exists(self._path("a.txt")))
+
+    def test_only_last_intent_per_source_is_resolved_after_crash(self):
+        source = self._write("a.txt", "A")
+        self._write("X.txt", "FOREIGN")
+        batch_id = self.engine.batch_id
+        # 崩溃前只写入了两次尝试的意图记录（第一次的中止记录也未写入），第二次尝试已完成
+        self.engine.journal.append([
+            self.engine._journal_record("intent", source, self._path("X.txt")),
+            self.engine._journal_record("intent", source, self._path("X (2).txt")),
+        ])
+        os.rename(source, self._path("X (2).txt"))
+
+        self.assertEqual(self.engine.renamed_sources(), {source: self._path("X (2).txt")})
+        self.assertEqual(self.engine.undo_batch(batch_id), (1, 0))
+        self.assertEqual(self._read("a.txt"), "A")
+        self.assertEqual(self._read("X.txt"), "FOREIGN")
+
+    def test_crashed_intent_without_commit_is_undoable(self):
+        source = self._write("a.txt", "A")
+        target = self._path("摘要.txt")
+        self.engine.journal.append([self.engine._journal_record("intent", source, target)])
+        os.rename(source, target)  # 重命名完成后、写入提交记录前崩溃
+
+        self.assertEqual(self.engine.list_batches(), [self.engine.batch_id])
+        self.assertEqual(self.engine.undo_batch(self.engine.batch_id), (1, 0))
+        self.assertEqual(self._read("a.txt"), "A")
+
+    def test_root_relative_journal_is_shared_across_mount_points(self):
+        engine = RenameEngine(journal_path=self.journal_path, root_dir=self.files_dir)
+        engine.begin_batch()
+        source = self._write("a.txt", "A")
+        engine.apply(engine.plan([(source, "摘要")]))
+
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            self.assertEqual(json.loads(f.readline())["source"], "a.txt")
+
+        # 另一节点通过符号链接以不同路径访问同一目录
+        alias = os.path.join(self.work_dir, "alias")
+        try:
+            os.symlink(self.files_dir, alias)
+        except (OSError, NotImplementedError):
+            self.skipTest("当前系统不支持符号链接")
+        other = RenameEngine(journal_path=self.journal_path, root_dir=alias)
+        self.assertEqual(other.renamed_sources(),
+                         {os.path.join(alias, "a.txt"): os.path.join(alias, "摘要.txt")})
+
+
+if __name__ == "__main__":
+    unittest.main()
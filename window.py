@@ -1,18 +1,27 @@
 import gc
+import hashlib
 import logging
 import os
 import sys
+import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QFileDialog,
-    QMessageBox, QListWidgetItem
+    QMessageBox, QMenu, QDialog, QVBoxLayout,
+    QTableWidget, QTableWidgetItem, QHeaderView
 )
 
 from UI.default import Ui_MainWindow
+from file_model import FileStateModel
+from near_duplicate import NearDuplicateIndex
 from processor import TextProcessor
+from rename_engine import RenameEngine
+from resource_governor import ResourceGovernor
+from summary_index import SummaryIndex, SummaryRecord
 
 # 配置日志系统 - 同时输出到文件和控制台
 logger = logging.getLogger(__name__)
@@ -55,71 +64,262 @@ class FileProcessingThread(QThread):
     负责异步处理文件，避免阻塞UI线程
     """
     # 信号定义
-    progress_updated = pyqtSignal(int, str, str)  # 进度更新 (当前进度, 文件名, 结果)
+    progress_updated = pyqtSignal(int, list)  # 进度更新 (当前进度, [(文件索引, 是否成功, 结果, 候选), ...])，是否成功为None表示等待重命名
     processing_completed = pyqtSignal(int, int)  # 处理完成 (成功数, 失败数)
 
-    def __init__(self, file_paths):
+    # 进度信号的最小发送间隔（秒），合并期间的结果后一次性发送，避免刷屏阻塞UI
+    PROGRESS_INTERVAL = 0.1
+
+    # 每累积多少个摘要结果规划并执行一次批量重命名
+    RENAME_BATCH_SIZE = 32
+
+    # 文件内容的语言代码（同时写入摘要索引）
+    LANGUAGE = "en"
+
+    def __init__(self, file_paths, candidate_count=1,
+                 near_duplicate_threshold=NearDuplicateIndex.DEFAULT_THRESHOLD,
+                 near_duplicate_suffix=False,
+                 accelerated=False,
+                 model_path=TextProcessor.DEFAULT_MODEL_PATH):
         """
         初始化文件处理线程
 
         Args:
             file_paths: 待处理的文件路径列表
+            candidate_count: 每个文件生成的候选文件名数量（1表示只生成单一文件名）
+            near_duplicate_threshold: 近似重复判定的相似度阈值，为None时不检测近似重复
+            near_duplicate_suffix: 复用近似重复文件名时是否追加基于内容哈希的区分后缀
+            accelerated: 是否启用分桶编译的加速推理
+            model_path: 模型目录（可使用 distill.py 生成的学生模型）
         """
         super().__init__()
         self.file_paths = file_paths
+        self.candidate_count = candidate_count
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.near_duplicate_suffix = near_duplicate_suffix
+        self.accelerated = accelerated
+        self.model_path = model_path
+        self.rename_engine = RenameEngine()
+        self._completed_count = 0  # 已完成（生成摘要或失败）的文件数
+        self._pending_updates = []  # 尚未发送的进度更新
+        self._last_emit_time = 0.0
+        self._summary_index = None  # 在处理线程中打开（SQLite连接不能跨线程使用）
+        self._success_count = 0  # 成功处理的文件数
+        self._reported_indices = set()  # 已报告最终结果的文件索引
+        self._summarized_indices = set()  # 已生成摘要、等待重命名的文件索引
         logger.info(f"创建文件处理线程，待处理文件数: {len(file_paths)}")
 
-    def run(self):
-        """线程主执行逻辑"""
-        logger.info("文件处理线程启动")
-        total_files = len(self.file_paths)
-        success_count = 0
+    def _report_progress(self, file_index, succeeded, result, candidates=None):
+        """
+        记录单个文件的处理结果，并按时间间隔合并发送进度信号
+        文件生成摘要后即计入进度，之后的重命名结果只更新其状态
 
-        for index, file_path in enumerate(self.file_paths):
-            logger.debug(f"开始处理文件 #{index + 1}/{total_files}: {file_path}")
-            filename = os.path.basename(file_path)
+        Args:
+            file_index: 文件在队列中的索引
+            succeeded: 是否处理成功，为None表示已生成摘要、等待重命名
+            result: 处理结果文本
+            candidates: 候选文件名列表 [(文件名, 得分), ...]
+        """
+        if succeeded is None:
+            self._summarized_indices.add(file_index)
+            self._completed_count += 1
+        else:
+            if file_index in self._summarized_indices:
+                self._summarized_indices.discard(file_index)
+            else:
+                self._completed_count += 1
+            self._reported_indices.add(file_index)
+        self._pending_updates.append((file_index, succeeded, result, candidates or []))
 
-            try:
-                # 初始化处理器并处理文件
-                processor = TextProcessor()
-                new_name = processor.process_file(file_path)
+        if time.monotonic() - self._last_emit_time >= self.PROGRESS_INTERVAL:
+            self._flush_progress()
+
+    def _flush_progress(self):
+        """立即发送所有尚未发送的进度更新"""
+        if self._pending_updates:
+            self.progress_updated.emit(self._completed_count, self._pending_updates)
+            self._pending_updates = []
+        self._last_emit_time = time.monotonic()
 
-                # 构建新文件名（添加原始文件后缀）
-                file_ext = Path(file_path).suffix.lower()
-                new_name_with_ext = new_name + file_ext
-                logger.info(f"文件处理成功: {filename} -> {new_name_with_ext}")
+    def _apply_renames(self, summaries):
+        """
+        为一批摘要结果规划并批量执行重命名
 
-                # 构建新文件路径
-                file_dir = os.path.dirname(file_path)
-                new_file_path = os.path.join(file_dir, new_name_with_ext)
+        Args:
+            summaries: (文件索引, 文件路径, 候选文件名列表, 原始摘要, 内容哈希) 元组列表，候选按优先级排序
 
-                # 检查文件是否已存在
-                if os.path.exists(new_file_path):
-                    raise FileExistsError(f"文件 {new_name_with_ext} 已存在")
+        Returns:
+            成功重命名的文件数
+        """
+        if not summaries:
+            return 0
+
+        try:
+            operations = self.rename_engine.plan([
+                (file_path, [name for name, _ in candidates]) for _, file_path, candidates, _, _ in summaries
+            ])
+            errors = self.rename_engine.apply(operations)
+        except Exception as e:
+            # 规划或写入重命名日志失败时，本批文件均视为失败（已执行的重命名仍记录在日志中，可撤销）
+            logger.error(f"批量重命名失败: {str(e)}")
+            logger.debug(f"错误详情:\n{traceback.format_exc()}")
+            for index, _, _, _, _ in summaries:
+                self._report_progress(index, False, f"错误: {str(e)}")
+            self._flush_progress()
+            return 0
+        outcomes = {
+            operation.source: (operation.target, error)
+            for operation, error in zip(operations, errors)
+        }
 
-                # 执行文件重命名
-                os.rename(file_path, new_file_path)
+        success_count = 0
+        records = []
+        for index, file_path, candidates, summary, content_hash in summaries:
+            # 未出现在规划中的文件，其目标名称与原名称相同，视为成功
+            target, error = outcomes.get(file_path, (file_path, None))
+            if error is None:
                 success_count += 1
-                logger.debug(f"文件重命名完成: {file_path} -> {new_file_path}")
-
-                # 发送进度更新信号
-                self.progress_updated.emit(index + 1, filename, new_name_with_ext)
+                alternatives = candidates if len(candidates) > 1 else None
+                self._report_progress(index, True, os.path.basename(target), alternatives)
+                records.append(SummaryRecord(os.path.abspath(file_path), target, summary,
+                                             self.LANGUAGE, content_hash))
+            else:
+                self._report_progress(index, False, f"错误: {str(error)}")
 
+        if self._summary_index is not None:
+            try:
+                self._summary_index.record_many(records)
             except Exception as e:
-                logger.error(f"处理文件 {filename} 失败: {str(e)}")
-                logger.debug(f"错误详情:\n{traceback.format_exc()}")
-                error_msg = f"错误: {str(e)}"
-                self.progress_updated.emit(index + 1, filename, error_msg)
+                logger.error(f"写入摘要索引失败: {str(e)}")
+
+        # 本批结果立即显示，不必等待下一个文件的进度报告
+        self._flush_progress()
+        return success_count
 
-            # 每处理5个文件执行一次垃圾回收
-            if index % 5 == 0 and index > 0:
-                logger.debug("触发垃圾回收")
-                gc.collect()
+    def run(self):
+        """线程主执行逻辑：无论处理过程是否异常，都会发送处理完成信号"""
+        logger.info("文件处理线程启动")
+        total_files = len(self.file_paths)
+        self._success_count = 0
+        self._reported_indices = set()
+        self._summarized_indices = set()
+        try:
+            self._process_files()
+        except Exception as e:
+            logger.error(f"文件处理线程异常终止: {str(e)}")
+            logger.debug(f"错误详情:\n{traceback.format_exc()}")
+            # 尚未得出结果的文件（包括已生成摘要、等待重命名的文件）均标记为失败
+            for index in range(total_files):
+                if index not in self._reported_indices:
+                    self._report_progress(index, False, f"错误: 处理中断: {str(e)}")
+        finally:
+            self._flush_progress()
+            if self._summary_index is not None:
+                self._summary_index.close()
+                self._summary_index = None
+
+            # 发送处理完成信号
+            failed_count = total_files - self._success_count
+            logger.info(f"文件处理完成: 成功 {self._success_count} 个, 失败 {failed_count} 个")
+            self.processing_completed.emit(self._success_count, failed_count)
+
+    def _process_files(self):
+        """读取、摘要并批量重命名所有文件，结果通过进度信号报告"""
+        total_files = len(self.file_paths)
+        pending_summaries = []  # 已生成摘要、等待批量重命名的文件
+
+        near_duplicate_index = None
+        if self.near_duplicate_threshold is not None:
+            near_duplicate_index = NearDuplicateIndex(
+                threshold=self.near_duplicate_threshold,
+                store_path=NearDuplicateIndex.DEFAULT_STORE_PATH
+            )
+        # 根据CPU与内存确定线程数和预读深度，须在模型推理前设置torch线程数
+        governor = ResourceGovernor()
+        governor.configure_torch()
+
+        try:
+            self._summary_index = SummaryIndex()
+        except RuntimeError as e:
+            logger.error(f"摘要索引不可用，本次不记录处理结果: {str(e)}")
+
+        # 路径、大小和修改时间与摘要索引一致的文件已处理过，直接跳过（不读取内容）
+        work_indices = []
+        for index, file_path in enumerate(self.file_paths):
+            record = self._summary_index.find_processed(file_path) if self._summary_index is not None else None
+            if record is None:
+                work_indices.append(index)
+            else:
+                self._success_count += 1
+                self._report_progress(index, True, os.path.basename(file_path))
+        if len(work_indices) < total_files:
+            logger.info(f"跳过摘要索引中已处理的文件 {total_files - len(work_indices)} 个")
+
+        processor = TextProcessor(near_duplicate_index=near_duplicate_index,
+                                  near_duplicate_suffix=self.near_duplicate_suffix,
+                                  accelerated=self.accelerated, model_path=self.model_path)
+        batch_id = self.rename_engine.begin_batch()
+
+        prefetched = {}  # 待处理队列中的位置 -> 预读任务
+        next_prefetch = 0
+        with ThreadPoolExecutor(max_workers=governor.worker_count, thread_name_prefix="summly-reader") as reader_pool:
+            for position, index in enumerate(work_indices):
+                # 预读后续文件，深度为当前批大小；内存超出预算时暂停预读（当前文件总是提交）
+                while next_prefetch < len(work_indices) and (
+                        next_prefetch == position
+                        or (next_prefetch - position < governor.batch_size and governor.admit())):
+                    prefetched[next_prefetch] = reader_pool.submit(
+                        processor.read_content, self.file_paths[work_indices[next_prefetch]], self.LANGUAGE)
+                    next_prefetch += 1
+
+                file_path = self.file_paths[index]
+                logger.debug(f"开始处理文件 #{index + 1}/{total_files}: {file_path}")
+                filename = os.path.basename(file_path)
+                start_time = time.perf_counter()
+                generation_count = processor.generation_count
+                # 模型推理耗时较长，推理前先发送积压的进度更新，避免界面停留在上一个文件
+                self._flush_progress()
+
+                try:
+                    file_content = prefetched.pop(position).result()
+                    if self.candidate_count > 1:
+                        candidates, summary = processor.process_file_candidates(
+                            file_path, top_k=self.candidate_count, language=self.LANGUAGE, file_content=file_content)
+                    else:
+                        filename_summary, summary = processor.process_file(
+                            file_path, language=self.LANGUAGE, file_content=file_content)
+                        candidates = [(filename_summary, 0.0)]
+
+                    # 只有实际运行了模型的文件才参与延迟统计（近似重复命中等快速路径会拉低基线）
+                    if processor.generation_count > generation_count:
+                        governor.record(time.perf_counter() - start_time)
+
+                    logger.info(f"文件处理成功: {filename} -> {candidates[0][0]}")
+                    content_hash = hashlib.sha1(file_content.encode("utf-8", errors="replace")).hexdigest()
+                    pending_summaries.append((index, file_path, candidates, summary, content_hash))
+                    self._report_progress(index, None, None)
+
+                except Exception as e:
+                    logger.error(f"处理文件 {filename} 失败: {str(e)}")
+                    logger.debug(f"错误详情:\n{traceback.format_exc()}")
+                    error_msg = f"错误: {str(e)}"
+                    self._report_progress(index, False, error_msg)
+
+                if len(pending_summaries) >= self.RENAME_BATCH_SIZE:
+                    self._success_count += self._apply_renames(pending_summaries)
+                    pending_summaries = []
+
+        self._success_count += self._apply_renames(pending_summaries)
+        if processor.accelerator is not None:
+            processor.accelerator.log_report()
+
+        if near_duplicate_index is not None:
+            try:
+                near_duplicate_index.save()
+            except Exception as e:
+                logger.error(f"保存近似重复索引失败: {str(e)}")
 
-        # 发送处理完成信号
-        failed_count = total_files - success_count
-        logger.info(f"文件处理完成: 成功 {success_count} 个, 失败 {failed_count} 个")
-        self.processing_completed.emit(success_count, failed_count)
+        logger.info(f"重命名批次 {batch_id} 已完成")
 
 
 class SummlyApp(QMainWindow):
@@ -139,12 +339,9 @@ class SummlyApp(QMainWindow):
         logger.info("UI设置完成")
 
         # 初始化内部状态
-        self.pending_files = []  # 待处理的文件路径列表
+        self.file_model = FileStateModel(self)  # 待处理文件及其处理状态
         self.processing_thread = None  # 当前处理线程
-        self.ui.processingFileList.addItem('')
-        self.ui.processingFileList.addItem('')
-        self.ui.processingFileList.addItem('')
-        self.ui.processingFileList.addItem('')
+        self.summary_index = None  # 摘要索引（首次检索或切换候选名称时打开）
 
         # 配置拖放功能
         self._setup_drag_drop()
@@ -170,13 +367,27 @@ class SummlyApp(QMainWindow):
         """连接UI组件信号到处理函数"""
         logger.debug("连接UI信号")
         self.ui.startProcessButton.clicked.connect(self._start_file_processing)
+        self.ui.searchButton.clicked.connect(self._search_summaries)
+        self.ui.searchLineEdit.returnPressed.connect(self._search_summaries)
+        self.ui.processLogList.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.ui.processLogList.customContextMenuRequested.connect(self._show_candidate_menu)
         logger.info("UI信号连接完成")
 
     def _init_ui_display(self):
         """初始化UI显示状态"""
         logger.debug("初始化UI显示")
-        # 添加占位符项目（可选）
-        # self.ui.processingFileList.addItems([''] * 4)
+        # 左右两个视图共享同一个模型，分别显示文件名列和结果列
+        self.ui.processingFileList.setModel(self.file_model)
+        self.ui.processingFileList.setModelColumn(FileStateModel.COLUMN_NAME)
+        self.ui.processLogList.setModel(self.file_model)
+        self.ui.processLogList.setModelColumn(FileStateModel.COLUMN_RESULT)
+        self.ui.nearDuplicateSpinBox.setValue(NearDuplicateIndex.DEFAULT_THRESHOLD)
+
+        # 同步左右两个视图的滚动位置，保证同一行对应同一个文件
+        file_scroll_bar = self.ui.processingFileList.verticalScrollBar()
+        log_scroll_bar = self.ui.processLogList.verticalScrollBar()
+        file_scroll_bar.valueChanged.connect(log_scroll_bar.setValue)
+        log_scroll_bar.valueChanged.connect(file_scroll_bar.setValue)
         logger.info("UI显示初始化完成")
 
     def _handle_drop_event(self, event):
@@ -214,37 +425,25 @@ class SummlyApp(QMainWindow):
         logger.info(f"尝试添加 {len(file_paths)} 个文件到处理队列")
 
         # 过滤有效文件并去重
-        existing_files = set(self.pending_files)
         valid_new_files = [
-            f for f in file_paths
-            if f not in existing_files and os.path.isfile(f)
+            f for f in dict.fromkeys(file_paths)
+            if not self.file_model.contains(f) and os.path.isfile(f)
         ]
 
         if not valid_new_files:
             logger.warning("没有找到有效的新文件")
             return
 
-        # 添加文件到队列并更新UI
-        for file_path in valid_new_files:
-            self.pending_files.append(file_path)
-            file_name = os.path.basename(file_path)
-
-            # 更新左侧文件列表
-            self.ui.processingFileList.addItem(file_name)
-
-            # 更新右侧处理结果列表（初始状态）
-            pending_item = QListWidgetItem("等待处理...")
-            pending_item.setForeground(Qt.GlobalColor.gray)
-            self.ui.processLogList.addItem(pending_item)
-
-        logger.info(f"成功添加 {len(valid_new_files)} 个文件")
+        # 批量添加文件到模型，视图只渲染可见行
+        added_count = self.file_model.add_files(valid_new_files)
+        logger.info(f"成功添加 {added_count} 个文件")
 
     def _start_file_processing(self):
         """开始文件处理流程"""
         logger.info("开始文件处理流程")
 
         # 检查是否有文件待处理
-        if not self.pending_files:
+        if self.file_model.rowCount() == 0:
             logger.warning("文件处理请求被拒绝：没有待处理的文件")
             QMessageBox.warning(self, "警告", "请先添加要处理的文件！")
             return
@@ -256,7 +455,8 @@ class SummlyApp(QMainWindow):
             return
 
         # 准备处理
-        file_count = len(self.pending_files)
+        file_paths = self.file_model.file_paths()
+        file_count = len(file_paths)
         logger.info(f"开始处理 {file_count} 个文件")
 
         # 更新UI状态
@@ -265,44 +465,134 @@ class SummlyApp(QMainWindow):
         self.ui.processProgressBar.setValue(0)
 
         # 更新处理状态
-        for i in range(self.ui.processLogList.count()):
-            item = self.ui.processLogList.item(i)
-            if item.text().startswith("错误:") or item.text() == "等待处理...":
-                item.setText("处理中...")
-                item.setForeground(Qt.GlobalColor.gray)
+        self.file_model.mark_processing()
 
         # 创建并启动处理线程
-        self.processing_thread = FileProcessingThread(self.pending_files.copy())
+        threshold_spin_box = self.ui.nearDuplicateSpinBox
+        near_duplicate_threshold = (
+            None if threshold_spin_box.value() == threshold_spin_box.minimum() else threshold_spin_box.value()
+        )
+        self.processing_thread = FileProcessingThread(
+            file_paths,
+            self.ui.candidateCountSpinBox.value(),
+            near_duplicate_threshold=near_duplicate_threshold,
+            near_duplicate_suffix=self.ui.nearDuplicateSuffixCheckBox.isChecked()
+        )
         self.processing_thread.progress_updated.connect(self._update_processing_progress)
         self.processing_thread.processing_completed.connect(self._handle_processing_finished)
         self.processing_thread.start()
         logger.info("文件处理线程已启动")
 
-    def _update_processing_progress(self, progress, file_name, result):
+    def _update_processing_progress(self, progress, updates):
         """
         更新处理进度显示
         Args:
             progress: 当前进度值
-            file_name: 文件名
-            result: 处理结果文本
+            updates: 合并后的 (文件索引, 是否成功, 结果文本, 候选) 列表
         """
-        logger.debug(f"更新处理进度: {progress}/{self.ui.processProgressBar.maximum()}, 文件: {file_name}")
+        logger.debug(f"更新处理进度: {progress}/{self.ui.processProgressBar.maximum()}, 本次更新 {len(updates)} 个文件")
 
         # 更新进度条
         self.ui.processProgressBar.setValue(progress)
 
-        # 更新结果列表
-        if 0 <= progress - 1 < self.ui.processLogList.count():
-            result_item = self.ui.processLogList.item(progress - 1)
-            result_item.setText(result)
+        # 批量更新结果（模型根据状态设置文本颜色）
+        self.file_model.apply_updates(updates)
 
-            # 根据结果设置文本颜色
-            if result.startswith("错误:"):
-                result_item.setForeground(Qt.GlobalColor.red)
-            else:
-                result_item.setForeground(Qt.GlobalColor.white)
-        else:
-            logger.warning(f"进度更新失败：索引 {progress - 1} 超出列表范围")
+    def _show_candidate_menu(self, position):
+        """
+        在结果列表中显示候选文件名菜单
+        Args:
+            position: 右键点击位置
+        """
+        index = self.ui.processLogList.indexAt(position)
+        if not index.isValid():
+            return
+
+        row = index.row()
+        candidates = self.file_model.candidates(row)
+        if not candidates:
+            return
+
+        current_path = self.file_model.current_path(row)
+        suffix = Path(current_path).suffix
+        menu = QMenu(self)
+        for name, score in candidates:
+            action = menu.addAction(f"{name}{suffix}  ({score:.3f})")
+            action.setEnabled(name + suffix != os.path.basename(current_path))
+            action.triggered.connect(lambda _, candidate=name: self._rename_to_candidate(row, candidate))
+        menu.exec(self.ui.processLogList.viewport().mapToGlobal(position))
+
+    def _rename_to_candidate(self, row, candidate):
+        """
+        将已处理的文件改名为用户选择的候选文件名
+        Args:
+            row: 文件所在行
+            candidate: 候选文件名（不含后缀）
+        """
+        if self.processing_thread and self.processing_thread.isRunning():
+            QMessageBox.warning(self, "警告", "当前有任务正在运行，请完成后再切换候选名称！")
+            return
+
+        current_path = self.file_model.current_path(row)
+        logger.info(f"切换候选文件名: {current_path} -> {candidate}")
+
+        rename_engine = RenameEngine()
+        rename_engine.begin_batch()
+        operations = rename_engine.plan([(current_path, candidate)])
+        errors = rename_engine.apply(operations)
+
+        if operations and errors[0] is not None:
+            QMessageBox.warning(self, "重命名失败", f"无法重命名文件:\n{str(errors[0])}")
+            return
+
+        new_name = os.path.basename(operations[0].target) if operations else os.path.basename(current_path)
+        self.file_model.apply_updates([(row, True, new_name, self.file_model.candidates(row))])
+
+        if operations:
+            try:
+                self._open_summary_index().move(current_path, operations[0].target)
+            except Exception as e:
+                logger.error(f"更新摘要索引失败: {str(e)}")
+
+    def _open_summary_index(self):
+        """打开（或复用）界面线程使用的摘要索引"""
+        if self.summary_index is None:
+            self.summary_index = SummaryIndex()
+        return self.summary_index
+
+    def _search_summaries(self):
+        """在摘要索引中检索，并在对话框中列出结果"""
+        query = self.ui.searchLineEdit.text().strip()
+        if not query:
+            return
+
+        try:
+            results = self._open_summary_index().search(query)
+        except Exception as e:
+            QMessageBox.warning(self, "检索失败", f"无法检索摘要索引:\n{str(e)}")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle(f"检索结果: {query} ({len(results)} 条)")
+        dialog.resize(800, 400)
+
+        table = QTableWidget(len(results), 4, dialog)
+        table.setHorizontalHeaderLabels(["当前文件", "原始路径", "摘要", "处理时间"])
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        table.horizontalHeader().setStretchLastSection(True)
+        for row, result in enumerate(results):
+            updated = time.strftime("%Y-%m-%d %H:%M", time.localtime(result.updated_at))
+            values = [os.path.basename(result.new_path), result.original_path, result.summary, updated]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setToolTip(result.new_path if column == 0 else value)
+                table.setItem(row, column, item)
+        table.resizeColumnsToContents()
+
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(table)
+        dialog.exec()
 
     def _handle_processing_finished(self, success_count, failure_count):
         """